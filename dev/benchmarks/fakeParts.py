@@ -0,0 +1,215 @@
+"""
+Lightweight stand-ins for the fontParts objects (and RoboFont modules)
+the extension uses, so the hot paths can be timed without RoboFont.
+
+Only the parts of the API the extension touches are here.
+Like fontParts, contour.segments builds new segment objects
+every time it's accessed.
+"""
+
+import sys
+import types
+
+class FakePoint:
+    def __init__(self, x, y, type="offcurve", selected=False):
+        self.x = x
+        self.y = y
+        self.type = type
+        self.selected = selected
+        self.smooth = False
+
+    def _get_position(self):
+        return (self.x, self.y)
+
+    def _set_position(self, value):
+        self.x, self.y = value
+
+    position = property(_get_position, _set_position)
+
+    def naked(self):
+        return self
+
+    def __repr__(self):
+        return "<FakePoint %s (%s, %s)>" % (self.type, self.x, self.y)
+
+
+class FakeSegment:
+    def __init__(self, points):
+        self.points = points
+
+    @property
+    def type(self):
+        return self.points[-1].type
+
+    @property
+    def onCurve(self):
+        return self.points[-1]
+
+    def _get_selected(self):
+        return all(point.selected for point in self.points)
+
+    def _set_selected(self, value):
+        for point in self.points:
+            point.selected = value
+
+    selected = property(_get_selected, _set_selected)
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+
+class FakeContour:
+    """
+    Closed contour. Segments are split the same
+    way fontParts splits them.
+    """
+    def __init__(self, points):
+        self.points = points
+
+    @property
+    def segments(self):
+        segments = [[]]
+        for point in self.points:
+            segments[-1].append(point)
+            if point.type != "offcurve":
+                segments.append([])
+        if not segments[-1]:
+            del segments[-1]
+        if self.points and self.points[-1].type == "offcurve":
+            if len(segments) > 1:
+                segment = segments.pop(-1)
+                segment.extend(segments[0])
+                del segments[0]
+                segments.append(segment)
+        else:
+            segments.append(segments.pop(0))
+        return [FakeSegment(points) for points in segments]
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+
+class FakeFont:
+    def __init__(self):
+        self.lib = {}
+
+
+class FakeGlyph:
+    """
+    Glyph that is also its own naked() object,
+    with just enough of defcon's notifications
+    """
+    def __init__(self, contours, name="fake", font=None):
+        self.contours = contours
+        self.name = name
+        self.font = font if font is not None else FakeFont()
+        self._observers = {}
+
+    def __iter__(self):
+        return iter(self.contours)
+
+    def __len__(self):
+        return len(self.contours)
+
+    def naked(self):
+        return self
+
+    def addObserver(self, observer, methodName, notification):
+        self._observers.setdefault(notification, []).append((observer, methodName))
+
+    def removeObserver(self, observer, notification):
+        observers = self._observers.get(notification, [])
+        self._observers[notification] = [(o, m) for o, m in observers if o is not observer]
+
+    def postNotification(self, notification):
+        info = types.SimpleNamespace(object=self, name=notification)
+        for observer, methodName in list(self._observers.get(notification, [])):
+            getattr(observer, methodName)(info)
+
+    def changed(self):
+        self.postNotification("Glyph.Changed")
+
+    def selectionChanged(self):
+        self.postNotification("Glyph.SelectionChanged")
+
+    def prepareUndo(self, title=None):
+        pass
+
+    def performUndo(self):
+        pass
+
+
+class FakeEventPoint:
+    """
+    Stand-in for the NSPoints passed to tool events
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class _Anything:
+    """
+    Accepts any call and any attribute, for UI
+    objects that don't matter to the benchmarks
+    """
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __setattr__(self, name, value):
+        pass
+
+    def get(self):
+        return 0
+
+
+class _FakeEditingTool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def installFakeRoboFont():
+    """
+    Put stand-ins for AppKit, vanilla and mojo modules in sys.modules,
+    so checkParallel and comCheckParallelUtils can be imported
+    """
+    def makeModule(name, **attributes):
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        module.__getattr__ = lambda attribute: _Anything()
+        module = sys.modules.setdefault(name, module)
+        # "import mojo.drawingTools as dt" looks the module up on its parent
+        parentName, _, childName = name.rpartition(".")
+        if parentName:
+            setattr(sys.modules[parentName], childName, module)
+        return module
+
+    noop = lambda *args, **kwargs: None
+    makeModule("AppKit")
+    makeModule("Foundation")
+    makeModule("vanilla")
+    makeModule("mojo")
+    makeModule("mojo.UI", UpdateCurrentGlyphView=noop)
+    makeModule("mojo.roboFont", CurrentFont=noop, CurrentGlyph=noop)
+    makeModule("mojo.events",
+               EditingTool=_FakeEditingTool,
+               installTool=noop,
+               addObserver=noop,
+               removeObserver=noop,
+               postEvent=noop)
+    drawingFunctions = ["stroke", "strokeWidth", "line", "fill",
+                        "newPath", "moveTo", "lineTo", "closePath", "drawPath",
+                        "save", "restore", "oval", "rect"]
+    makeModule("mojo.drawingTools", **{name: noop for name in drawingFunctions})
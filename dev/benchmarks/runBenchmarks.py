@@ -0,0 +1,302 @@
+"""
+Time the hot paths of the extension on synthetic glyphs,
+without RoboFont, and compare against stored baselines.
+
+    python runBenchmarks.py                 # run and compare with baselines.json
+    python runBenchmarks.py --save          # run and store results as the new baselines
+    python runBenchmarks.py --sizes 50 1000 --selection 0.5
+
+Baselines only mean something on the machine they were recorded on,
+so record them on your machine before making changes.
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+import numpy as np
+
+currentDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(currentDir, "..", "lib"))
+
+from fakeParts import installFakeRoboFont, FakeEventPoint, FakePoint
+installFakeRoboFont()
+
+from syntheticGlyphs import makeGlyph, selectPoints, pointCount, makeBinaryFont
+from comCheckParallelUtils.drawingDelegate import DrawingDelegate
+from comCheckParallelUtils.binaryAudit import auditBinary
+import comCheckParallelUtils.helperFuncs as hf
+import comCheckParallelUtils.batchFuncs as bf
+import checkParallel
+
+baselinesPath = os.path.join(currentDir, "baselines.json")
+
+# Segments per contour for each glyph size, with 2 contours per glyph.
+# 25 segments is roughly a plain Latin glyph, 100 a dense CJK or script glyph.
+DEFAULT_SIZES = [10, 25, 100]
+
+
+def timePerCall(func, repeat=3):
+    """
+    Return the best time (in seconds) of one call to func
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def getCurveSegments(glyph):
+    segments = []
+    for contour in glyph:
+        for segmentIndex, prevPt, segment in hf.findCurveSegments(contour):
+            segments.append((prevPt, segment))
+    return segments
+
+
+def benchAnalyzeSelection(glyph):
+    delegate = DrawingDelegate()
+
+    def cold():
+        # What every redraw used to cost
+        glyph.changed()
+        delegate._analyzeSelection(glyph)
+
+    def cached():
+        delegate._analyzeSelection(glyph)
+
+    return {"analyzeSelection (cold)": timePerCall(cold),
+            "analyzeSelection (cached)": timePerCall(cached)}
+
+
+def benchDraw(glyph):
+    """
+    Time full redraws, of the selection and of the whole glyph overlay,
+    after making sure deviations sitting right on a color step get
+    the color they got before colors were found by threshold
+    """
+    delegate = DrawingDelegate()
+    colorTable = delegate.colorTable
+    halfSteps = colorTable.halfSteps
+    for tolerance in (7.7, 2.5, 0.3):
+        failSpan = max(tolerance, colorTable.minFailSpan)
+        steps = np.arange(halfSteps + 1)
+        onSteps = np.concatenate([steps * tolerance / halfSteps, tolerance + steps * failSpan / halfSteps])
+        deviations = np.sort(np.concatenate([np.nextafter(onSteps, -np.inf), onSteps, np.nextafter(onSteps, np.inf)]))
+        expected = np.where(deviations <= tolerance,
+                            np.minimum(deviations * (halfSteps / tolerance), halfSteps - 1),
+                            halfSteps + np.minimum((deviations - tolerance) * (halfSteps / failSpan), halfSteps - 1))
+        expected = expected.astype(np.intp).tolist()
+        edges = colorTable.getColorEdges(deviations, tolerance)
+        assert np.repeat(np.arange(len(edges) - 1), np.diff(edges)).tolist() == expected, "color steps moved"
+        assert colorTable.getColorIndices(deviations, tolerance).tolist() == expected, "color steps moved"
+
+    def drawSelection():
+        delegate.draw(1, glyph)
+
+    def drawGlyphCold():
+        glyph.changed()
+        delegate.draw(1, glyph)
+
+    def drawGlyphCached():
+        delegate.draw(1, glyph)
+
+    results = {"draw selection (cached)": timePerCall(drawSelection)}
+    delegate.showAllSegments = True
+    results["draw whole glyph (cold)"] = timePerCall(drawGlyphCold)
+    results["draw whole glyph (cached)"] = timePerCall(drawGlyphCached)
+    return results
+
+
+def benchHelpers(glyph):
+    segments = getCurveSegments(glyph)
+    lines = [((prevPt, segment.onCurve), (segment.points[0], segment.points[1])) for prevPt, segment in segments]
+    points = [pt for contour in glyph for pt in contour.points]
+    contours = list(glyph)
+
+    def areTheyParallel():
+        for line1, line2 in lines:
+            hf.areTheyParallel(line1, line2, 2.5)
+
+    def isPointInLine():
+        for line1, line2 in lines:
+            h1, h2 = line2
+            hf.isPointInLine(((h1.x + h2.x) / 2, (h1.y + h2.y) / 2), (h1, h2), 1)
+
+    def findNextPt():
+        for contour in contours:
+            for point in contour.points:
+                if point.type != "offcurve":
+                    hf.findNextPt(point, contour)
+
+    segmentCount = max(len(lines), 1)
+    onCurveCount = max(len([pt for pt in points if pt.type != "offcurve"]), 1)
+    return {"areTheyParallel (per segment)": timePerCall(areTheyParallel) / segmentCount,
+            "isPointInLine (per segment)": timePerCall(isPointInLine) / segmentCount,
+            "findNextPt (per point)": timePerCall(findNextPt) / onCurveCount}
+
+
+def benchBatchParallel(glyph):
+    """
+    Check the glyph's segments in one batch, after making sure
+    segments sitting right on the tolerance agree with the helpers
+    """
+    # Handles at exactly 45° to the oncurves, in every quadrant
+    segments = [(FakePoint(0, 0), (FakePoint(0, 0), FakePoint(dx * 10, dy * 10), FakePoint(dx * 10, 0)))
+                for dx in (1, -1) for dy in (1, -1)]
+    boundary = bf.packSegments(segments)
+    for tolerance in (45, 44.99):
+        expected = [hf.areTheyParallel((prevPt, pt), (h1, h2), tolerance) for prevPt, (h1, h2, pt) in segments]
+        assert expected == [tolerance >= 45] * len(segments)
+        assert bf.areTheyParallel(boundary, tolerance).tolist() == expected, "45° boundary disagrees"
+        assert bf.checkSegments(boundary, tolerance)[1].tolist() == expected, "45° boundary disagrees"
+
+    coords = bf.packSegments(getCurveSegments(glyph))
+    return {"batch areTheyParallel (per segment)": timePerCall(lambda: bf.areTheyParallel(coords, 2.5)) / max(len(coords), 1)}
+
+
+def benchHitTesting(glyph):
+    """
+    Look up the connection line under points spread over the glyph
+    """
+    delegate = DrawingDelegate()
+    delegate.scale = 1
+    queryPoints = []
+    for prevPt, segment in getCurveSegments(glyph):
+        h1, h2, pt = segment
+        queryPoints.append(((h1.x + h2.x) / 2, (h1.y + h2.y) / 2))
+        queryPoints.append((pt.x + 10, pt.y + 10))
+
+    def findConnectionLine():
+        for point in queryPoints:
+            delegate.findConnectionLine(glyph, point)
+
+    return {"findConnectionLine (per query)": timePerCall(findConnectionLine) / max(len(queryPoints), 1)}
+
+
+def benchMouseDragged(glyph):
+    """
+    Click on the connection line of the first curve segment
+    and time each drag event
+    """
+    prevPt, segment = getCurveSegments(glyph)[0]
+    selectPoints(glyph, 0)
+    segment.selected = True
+    glyph.selectionChanged()
+
+    # Guides have been drawn at least once before the click
+    delegate = DrawingDelegate()
+    delegate.scale = 1
+    delegate._analyzeSelection(glyph)
+    tool = checkParallel.EditConnectionLineTool(delegate)
+    tool.glyph = glyph
+
+    h1, h2, pt = segment
+    clickPoint = FakeEventPoint((h1.x + h2.x) / 2, (h1.y + h2.y) / 2)
+    tool.mouseDown(clickPoint, 1)
+    assert not tool.canMarquee, "click missed the connection line"
+
+    deltas = [FakeEventPoint(dx, dx * 0.5) for dx in range(-20, 20)]
+
+    def drag():
+        for delta in deltas:
+            tool.mouseDragged(FakeEventPoint(clickPoint.x + delta.x, clickPoint.y + delta.y), delta)
+
+    result = timePerCall(drag) / len(deltas)
+    tool.mouseUp(clickPoint)
+    return {"mouseDragged (per event)": result}
+
+
+def benchBinaryAudit(glyph):
+    """
+    Check a compiled font with the glyph and two composites of it
+    """
+    with tempfile.TemporaryDirectory() as tempDir:
+        fontPath = os.path.join(tempDir, "synthetic.ttf")
+        makeBinaryFont(glyph, fontPath)
+
+        results = auditBinary(fontPath, 2.5)
+        segmentCounts = {}
+        for result in results:
+            segmentCounts[result["glyph"]] = segmentCounts.get(result["glyph"], 0) + 1
+        baseCount = segmentCounts.get("base", 0)
+        assert segmentCounts.get("composite") == 2 * baseCount, "composite not decomposed"
+        assert segmentCounts.get("nested") == 2 * baseCount, "nested composite not decomposed"
+
+        return {"auditBinary (per segment)": timePerCall(lambda: auditBinary(fontPath, 2.5)) / max(len(results), 1)}
+
+
+def runBenchmarks(sizes, selectionDensity):
+    """
+    Return {caseName: {benchmarkName: secondsPerCall}}
+    """
+    results = {}
+    for segmentsPerContour in sizes:
+        glyph = makeGlyph(contourCount=2, segmentsPerContour=segmentsPerContour,
+                          selectionDensity=selectionDensity)
+        caseName = "%d points, %d%% selected" % (pointCount(glyph), selectionDensity * 100)
+
+        caseResults = {}
+        caseResults.update(benchAnalyzeSelection(glyph))
+        caseResults.update(benchDraw(glyph))
+        caseResults.update(benchHelpers(glyph))
+        caseResults.update(benchBatchParallel(glyph))
+        caseResults.update(benchHitTesting(glyph))
+        caseResults.update(benchMouseDragged(glyph))
+        caseResults.update(benchBinaryAudit(glyph))
+        results[caseName] = caseResults
+    return results
+
+
+def printResults(results, baselines):
+    for caseName, caseResults in results.items():
+        print(caseName)
+        for name, seconds in caseResults.items():
+            line = "    %-32s %10.2f µs" % (name, seconds * 1e6)
+            baseline = baselines.get(caseName, {}).get(name)
+            if baseline:
+                line += "   %5.2fx baseline" % (seconds / baseline)
+            print(line)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark CheckParallelTool hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="segments per contour for each glyph (2 contours per glyph)")
+    parser.add_argument("--selection", type=float, default=0.1,
+                        help="fraction of points selected")
+    parser.add_argument("--save", action="store_true",
+                        help="store results as the new baselines")
+    parser.add_argument("--max-ratio", type=float, default=None,
+                        help="exit with an error if anything is this many times slower than its baseline")
+    args = parser.parse_args(args)
+
+    baselines = {}
+    if os.path.exists(baselinesPath):
+        with open(baselinesPath) as baselinesFile:
+            baselines = json.load(baselinesFile)
+
+    results = runBenchmarks(args.sizes, args.selection)
+    printResults(results, baselines)
+
+    if args.save:
+        baselines.update(results)
+        with open(baselinesPath, "w") as baselinesFile:
+            json.dump(baselines, baselinesFile, indent=2, sort_keys=True)
+        print("Saved baselines to %s" % baselinesPath)
+
+    if args.max_ratio is not None:
+        slower = [(caseName, name)
+                  for caseName, caseResults in results.items()
+                  for name, seconds in caseResults.items()
+                  if baselines.get(caseName, {}).get(name) and seconds / baselines[caseName][name] > args.max_ratio]
+        for caseName, name in slower:
+            print("Slower than baseline: %s, %s" % (caseName, name))
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
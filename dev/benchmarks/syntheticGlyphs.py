@@ -0,0 +1,126 @@
+"""
+Generate glyphs made of FakeParts, scaled by number of contours,
+points per contour and how much of the glyph is selected.
+makeBinaryFont() compiles one into a TrueType font, with composites.
+"""
+
+import math
+import random
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.timeTools import timestampNow
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from fakeParts import FakePoint, FakeContour, FakeGlyph
+
+def makeContour(segmentCount, rng, curveRatio=0.8, centerX=500, centerY=500, radius=400):
+    """
+    Make a closed contour going around a circle,
+    with segmentCount segments, most of them curves.
+    Handles are placed close to parallel, with some jitter.
+    """
+    points = []
+    step = 2 * math.pi / segmentCount
+    for i in range(segmentCount):
+        angle = i * step
+        nextAngle = angle + step
+        x0 = centerX + radius * math.cos(angle)
+        y0 = centerY + radius * math.sin(angle)
+        x1 = centerX + radius * math.cos(nextAngle)
+        y1 = centerY + radius * math.sin(nextAngle)
+
+        if rng.random() < curveRatio:
+            # bcps a third of the way in, pushed outwards a bit
+            bulge = radius * step * 0.2
+            normalX, normalY = math.cos(angle + step / 2), math.sin(angle + step / 2)
+            jitter = lambda: rng.uniform(-3, 3)
+            points.append(FakePoint(round(x0 + (x1 - x0) / 3 + normalX * bulge + jitter()),
+                                    round(y0 + (y1 - y0) / 3 + normalY * bulge + jitter())))
+            points.append(FakePoint(round(x0 + 2 * (x1 - x0) / 3 + normalX * bulge + jitter()),
+                                    round(y0 + 2 * (y1 - y0) / 3 + normalY * bulge + jitter())))
+            points.append(FakePoint(round(x1), round(y1), "curve"))
+        else:
+            points.append(FakePoint(round(x1), round(y1), "line"))
+
+    # fontParts contours start on an oncurve
+    while points[0].type == "offcurve":
+        points.append(points.pop(0))
+    return FakeContour(points)
+
+def makeGlyph(contourCount=2, segmentsPerContour=20, selectionDensity=0.1,
+              curveRatio=0.8, seed=0, name="synthetic"):
+    """
+    Make a glyph with contourCount contours of segmentsPerContour
+    segments each. selectionDensity is the fraction of points
+    that are selected (0 to 1).
+    """
+    rng = random.Random(seed)
+    contours = []
+    for i in range(contourCount):
+        radius = 400 - 300 * i / max(contourCount, 1)
+        contours.append(makeContour(segmentsPerContour, rng, curveRatio, radius=radius))
+
+    glyph = FakeGlyph(contours, name=name)
+    selectPoints(glyph, selectionDensity, seed)
+    return glyph
+
+def selectPoints(glyph, selectionDensity, seed=0):
+    """
+    Select a random fraction of the glyph's points
+    """
+    rng = random.Random(seed)
+    for contour in glyph:
+        for point in contour.points:
+            point.selected = rng.random() < selectionDensity
+    glyph.selectionChanged()
+
+def makeBinaryFont(glyph, path):
+    """
+    Save a TrueType font (cubic glyf outlines) with the glyph as "base",
+    and composites using it: "composite" (base, then base scaled
+    non-uniformly) and "nested" (composite, moved).
+    """
+    pen = TTGlyphPen(None)
+    for contour in glyph:
+        # Start from the last oncurve, offcurves can wrap around the end
+        points = contour.points
+        last = max(i for i, point in enumerate(points) if point.type != "offcurve")
+        points = points[last + 1:] + points[:last + 1]
+        pen.moveTo((points[-1].x, points[-1].y))
+        offCurves = []
+        for point in points:
+            if point.type == "offcurve":
+                offCurves.append((point.x, point.y))
+            elif offCurves:
+                pen.curveTo(*offCurves, (point.x, point.y))
+                offCurves = []
+            else:
+                pen.lineTo((point.x, point.y))
+        pen.closePath()
+    glyphs = {".notdef": TTGlyphPen(None).glyph(), "base": pen.glyph()}
+
+    pen = TTGlyphPen(glyphs)
+    pen.addComponent("base", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("base", (0.5, 0, 0, 0.75, 100, 50))
+    glyphs["composite"] = pen.glyph()
+    pen = TTGlyphPen(glyphs)
+    pen.addComponent("composite", (1, 0, 0, 1, 20, 0))
+    glyphs["nested"] = pen.glyph()
+
+    glyphOrder = list(glyphs)
+    builder = FontBuilder(1000, isTTF=True)
+    # Cubic glyf outlines need glyphDataFormat 1
+    builder.font["head"].glyphDataFormat = 1
+    builder.font["head"].created = builder.font["head"].modified = timestampNow()
+    builder.setupGlyphOrder(glyphOrder)
+    builder.setupCharacterMap({})
+    builder.setupGlyf(glyphs)
+    builder.setupHorizontalMetrics({name: (1000, 0) for name in glyphOrder})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": "Synthetic", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    builder.save(path)
+
+def pointCount(glyph):
+    return sum(len(contour.points) for contour in glyph)
@@ -7,6 +7,8 @@ The extension adds observers to draw guides and installs a tool.
 
 Guides are toggled by pressing the "/" key and can be used
 with any tool (EditingTool, ScalingEditTool, etc.)
+Shift + "/" shows guides for every curve segment in the glyph.
+Option + "/" shows how long the guides take to draw.
 
 Lines connecting BCPs can be directly edited with the
 Edit Parallel Tool (still WIP).
@@ -24,10 +26,17 @@ from mojo.UI import UpdateCurrentGlyphView
 from comCheckParallelUtils.drawingDelegate import DrawingDelegate
 from comCheckParallelUtils.guideStatusView import GuideStatusView
 from comCheckParallelUtils.toleranceWindow import ToleranceWindow
-import comCheckParallelUtils.helperFuncs as hf
+from comCheckParallelUtils.toleranceSettings import toleranceSettings
+from comCheckParallelUtils.dragSolver import HandleDragSolver
+from comCheckParallelUtils.frameCoalescer import FrameCoalescer
+from comCheckParallelUtils.profiler import profiled, FrameStats
 
 # "/" key to turn guide on and off
 KEYCODE = 44
+# Shift + "/" to switch between selected segments and whole glyph
+SHIFT_KEY_MASK = 1 << 17
+# Option + "/" to show frame timings under the guide status
+OPTION_KEY_MASK = 1 << 19
 
 currentDir = os.path.dirname(__file__)
 
@@ -44,6 +53,7 @@ class ParallelGuides:
 
         addObserver(self, "keyDownCB", "keyDown")
         addObserver(self, "glyphWindowOpenCB", "glyphWindowDidOpen")
+        toleranceSettings.addListener(self.toleranceChangedCB)
 
     def glyphWindowOpenCB(self, info):
         """
@@ -57,29 +67,65 @@ class ParallelGuides:
         When user presses "/" with CheckParallelTool() inactive,
         toggle between drawing guides or not.
 
+        When user presses Shift + "/", toggle between
+        guides for selected segments or for the whole glyph
+        (and turn guides on if they're off).
+
+        When user presses Option + "/", toggle diagnostics
+        (frame timings) under the guide status.
+
         Also set the guide status at the bottom right of the
         glyph window.
         """
-        keyCode = info["event"].keyCode()
+        event = info["event"]
+        keyCode = event.keyCode()
         if keyCode != KEYCODE:
             return
 
-        self.displayGuides = not self.displayGuides
+        if event.modifierFlags() & OPTION_KEY_MASK:
+            if self.delegate.frameStats is None:
+                self.delegate.frameStats = FrameStats()
+                self.guideStatus.setDiagnostics(True)
+            else:
+                self.delegate.frameStats = None
+                self.guideStatus.setDiagnostics(False)
+            UpdateCurrentGlyphView()
+            return
+
+        if event.modifierFlags() & SHIFT_KEY_MASK:
+            self.delegate.showAllSegments = not self.delegate.showAllSegments
+            if not self.displayGuides:
+                self.displayGuides = True
+                addObserver(self, "drawCB", "draw")
+        else:
+            self.displayGuides = not self.displayGuides
+            if self.displayGuides:
+                addObserver(self, "drawCB", "draw")
+            else:
+                removeObserver(self, "draw")
 
         if self.displayGuides:
-            self.guideStatus.turnStatusTextOn()
-            addObserver(self, "drawCB", "draw")
+            self.guideStatus.turnStatusTextOn(self.delegate.showAllSegments)
         else:
             self.guideStatus.turnStatusTextOff()
-            removeObserver(self, "draw")
 
         UpdateCurrentGlyphView()
 
+    def toleranceChangedCB(self, settings, font):
+        """
+        Redraw guides in their new colors
+        when a tolerance changes
+        """
+        if self.displayGuides:
+            UpdateCurrentGlyphView()
+
     def drawCB(self, info):
         """
         Pass on to delegate method
         """
         self.delegate.draw(info)
+        if self.delegate.frameStats is not None:
+            self.guideStatus.updateDiagnostics(self.delegate.frameStats)
 
 
 class EditConnectionLineTool(EditingTool):
@@ -90,7 +136,7 @@ class EditConnectionLineTool(EditingTool):
     def __init__(self, delegate):
         super().__init__()
         self.delegate = delegate
-        self.toleranceWindow = ToleranceWindow()
+        self.toleranceWindow = ToleranceWindow(self.setSnapToParallel)
 
         self.glyph = None
 
@@ -99,6 +145,15 @@ class EditConnectionLineTool(EditingTool):
         self.lineWeightMultiplier = 1
         self.mouseDownPoint = None
 
+        # (prevPt, segment) whose connection line was clicked
+        self.clickedSegment = None
+        self.dragSolver = None
+        self.snapToParallel = False
+
+        # Handle positions are applied (and the glyph changed)
+        # at most once per display frame while dragging
+        self.dragCoalescer = FrameCoalescer(self._applyHandlePositions)
+
         self.canMarquee = True
 
     def getToolbarIcon(self):
@@ -117,19 +172,34 @@ class EditConnectionLineTool(EditingTool):
 
     def setup(self):
         """
-        Set up some defaults and watch for
-        event posted by ToleranceWindow()
+        Set up some defaults and listen for
+        tolerance changes (eg. from ToleranceWindow())
         """
         self.glyph = CurrentGlyph()
-        addObserver(self, "_applyTolerance", "com.ToleranceSettingChanged")
+        toleranceSettings.addListener(self._applyTolerance)
 
     def becomeInactive(self):
         """
         Tool becomes inactive
         """
         self.toolIsActive = False
-        removeObserver(self, "com.ToleranceSettingChanged")
+        self.delegate.hoveredSegment = None
+        toleranceSettings.removeListener(self._applyTolerance)
+
+    def mouseMoved(self, point):
+        """
+        Highlight the connection line under the cursor.
+        Works for every curve segment, not only selected ones.
+        """
+        if self.glyph is None:
+            return
 
+        hovered = self.delegate.findConnectionLine(self.glyph, (point.x, point.y))
+        if hovered is not self.delegate.hoveredSegment:
+            self.delegate.hoveredSegment = hovered
+            UpdateCurrentGlyphView()
+
+    @profiled("EditConnectionLineTool.mouseDown")
     def mouseDown(self, point, clickCount):
         """
         Mouse down stuff.
@@ -154,79 +224,69 @@ class EditConnectionLineTool(EditingTool):
         self._selectSegmentWhenBCPConnectionIsClicked()
         self.delegate._analyzeSelection(self.glyph)
 
-        # Only calculate slopes & intercepts when 1 segment is selected
-        if len(self.delegate._selectedSegments) != 1:
+        # Work out how the handles move once, so each
+        # drag event only has to do a few multiply-adds
+        self.dragSolver = None
+        self.dragCoalescer.reset()
+        if self.clickedSegment is None:
             return
 
-        for selected in self.delegate._selectedSegments:
-            pt1, segment = selected
-            self.h1, self.h2, pt2 = segment
-
-            self.h1Pos = self.h1.position
-            self.h2Pos = self.h2.position
-
-            self.slope0, self.intercept0 = hf.getSlopeAndIntercept(pt1.position, self.h1Pos)
-            self.slope1, self.intercept1 = hf.getSlopeAndIntercept(pt2.position, self.h2Pos)
+        pt1, segment = self.clickedSegment
+        self.h1, self.h2, pt2 = segment
+        self.dragSolver = HandleDragSolver(pt1.position, self.h1.position,
+                                           self.h2.position, pt2.position,
+                                           self.delegate.tolerance,
+                                           self.snapToParallel)
 
     def mouseUp(self, point):
         """
-        Reset some values
+        Round BCPs (only once the drag is done,
+        so they don't drift) and reset some values
         """
+        if self.dragSolver is not None and not self.canMarquee:
+            # Apply last drag event before rounding
+            self.dragCoalescer.flush()
+            self.h1.position = (round(self.h1.x), round(self.h1.y))
+            self.h2.position = (round(self.h2.x), round(self.h2.y))
+            self.glyph.changed()
+
         self.mouseDownPoint = None
+        self.clickedSegment = None
+        self.dragSolver = None
         self.canMarquee = True
         self.lineWeightMultiplier = 1
         self.glyph.performUndo()
 
+    @profiled("EditConnectionLineTool.mouseDragged")
     def mouseDragged(self, point, delta):
         """
-        Do some math and figure out where BCPs should
-        go as the mouse is being dragged around.
+        Figure out where BCPs should go as the mouse
+        is being dragged around: each BCP slides along
+        its own handle (see HandleDragSolver).
         """
-        # Only manipulate BCPs if one segment is selected
-        # and if user clicks on connection line
+        # Only manipulate BCPs if user clicks on connection line
         # (canMarquee is True if user clicks outside of connetion line)
-        if len(self.delegate._selectedSegments) != 1 or\
-        self.canMarquee:
+        if self.dragSolver is None or self.canMarquee:
             return
 
-        bcp0X, bcp0Y = self.h1Pos
-        bcp1X, bcp1y = self.h2Pos
-
-        # New point = current point + delta (for now)
-        bcp0XtoUse = bcp0X + delta.x
-        bcp0YtoUse = bcp0Y + delta.y
-        bcp1XtoUse = bcp1X + delta.x
-        bcp1YtoUse = bcp1y + delta.y
-
-        # First BCP
-        # Horizontal line, so new y == old y
-        if self.slope0 == 0:
-            bcp0YtoUse = bcp0Y
-
-        # Vertical line, so new x == old x
-        elif self.slope0 is None:
-            bcp0XtoUse = bcp0X
-
-        # Angled line, use y=mx+b to find out new x & y,
-        # using x, y calculated above... this seems weird.
-        else:
-            bcp0XtoUse = (bcp0YtoUse - self.intercept0) / self.slope0
-            bcp0YtoUse = self.slope0 * bcp0XtoUse + self.intercept0
-
-        # Second BCP, same as above
-        if self.slope1 == 0:
-            bcp1YtoUse = bcp1y
-        elif self.slope1 is None:
-            bcp1XtoUse = bcp1X
-        else:
-            bcp1XtoUse = (bcp1YtoUse - self.intercept1) / self.slope1
-            bcp1YtoUse = self.slope1 * bcp1XtoUse + self.intercept1
-
-        self.h1.position = (round(bcp0XtoUse), round(bcp0YtoUse))
-        self.h2.position = (round(bcp1XtoUse), round(bcp1YtoUse))
+        self.dragCoalescer.submit(self.dragSolver.solve(delta.x, delta.y))
 
+    def _applyHandlePositions(self, positions):
+        """
+        Called by self.dragCoalescer, at most once per frame:
+        move BCPs and let everyone know the glyph changed
+        """
+        self.h1.position, self.h2.position = positions
         self.glyph.changed()
 
+    def setSnapToParallel(self, value):
+        """
+        Called by ToleranceWindow():
+        lock connection line parallel to the oncurves
+        when it comes within tolerance while dragging
+        """
+        self.snapToParallel = value
+
     def getMarqueRect(self, offset=None, previousRect=False):
         """
         Return no marquee rectangle when user
@@ -251,28 +311,34 @@ class EditConnectionLineTool(EditingTool):
         """
         self.delegate.draw(scale, self.glyph, self.lineWeightMultiplier)
 
-    def _applyTolerance(self, info):
+    def _applyTolerance(self, settings, font):
         """
-        Pass to delegate object's method:
-        Redefine tolerance whenever com.ToleranceSettingChanged is triggered
+        toleranceSettings listener:
+        Redefine tolerance whenever a tolerance changes
+        and redraw, so guides follow the slider
         """
-        self.delegate.readToleranceSetting()
+        font = self.glyph.font if self.glyph is not None else None
+        self.delegate.readToleranceSetting(font)
+        UpdateCurrentGlyphView()
 
     def _selectSegmentWhenBCPConnectionIsClicked(self):
         """
-        Keep segment selected when click point is w/in
-        line connecting bcps
+        Select segment when click point is w/in
+        line connecting bcps. Any curve segment can be
+        clicked, whether it was selected before or not.
 
         If multiple segments are selected, only one
         segment will remain selected
         """
-        for selected in self.delegate._selectedSegments:
-            p1, segment = selected
-            h1, h2, p2 = segment
-            if hf.isPointInLine(self.mouseDownPoint, (h1, h2), self.delegate.scale):
-                self.canMarquee = False
-                self.lineWeightMultiplier = 4
-                segment.selected = True
+        clicked = self.delegate.findConnectionLine(self.glyph, self.mouseDownPoint)
+        self.clickedSegment = clicked
+        if clicked is None:
+            return
+
+        p1, segment = clicked
+        self.canMarquee = False
+        self.lineWeightMultiplier = 4
+        segment.selected = True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+"""
+Command line version of the parallel check.
+
+Opens a UFO without RoboFont, checks every curve segment
+of every glyph and writes a report (JSON or CSV) listing
+glyph, contour index, segment index and angle deviation.
+
+    python checkParallelAudit.py MyFont.ufo
+    python checkParallelAudit.py MyFont.ufo --tolerance 1.5 --format csv -o report.csv
+
+Compiled fonts (TTF/OTF) are checked directly with fontTools,
+at the default instance or at --location for variable fonts:
+
+    python checkParallelAudit.py MyFont-VF.ttf --location wght=700,wdth=85
+
+By default only non-parallel segments are reported.
+
+With --since, only glyphs that changed since a git revision
+(until another one, or the working tree) are checked, and the
+exit status is 1 if any of them has new non-parallel segments.
+The working tree includes unstaged edits, so as a pre-commit hook
+add --cached to check what is about to be committed:
+
+    python checkParallelAudit.py MyFont.ufo --since HEAD --cached
+
+Results are cached per glyph outline in the user's cache folder,
+so only glyphs that changed since the last run are checked again.
+Use --no-cache to check everything.
+
+--fast skips fontParts and reads the .glif files directly,
+which is much quicker for big fonts (the cache isn't used then,
+reading the outlines is most of the work anyway).
+
+--components also checks the segments composite glyphs get from
+their components, as if they were decomposed. Base glyphs are only
+checked once, however many components use them (implies --fast):
+
+    python checkParallelAudit.py MyFont.ufo --components
+
+With --watch, the check keeps running and checks glyphs again
+as their .glif files are saved, rewriting the report (if -o is given)
+and printing a line for every glyph that changed:
+
+    python checkParallelAudit.py MyFont.ufo --watch -o report.json
+"""
+import os
+import sys
+import sqlite3
+import argparse
+import subprocess
+
+from comCheckParallelUtils.fontAudit import auditFont, auditUFO, writeReport, readFontTolerance, REPORT_FIELDS
+from comCheckParallelUtils.resultCache import ResultCache
+from comCheckParallelUtils.gitDiff import auditChanges, DIFF_REPORT_FIELDS, INDEX
+from comCheckParallelUtils.glyphWatcher import GlyphWatcher
+from comCheckParallelUtils.binaryAudit import auditBinary
+
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Check if the lines connecting BCPs "
+                                                 "and oncurves are parallel in a whole font.")
+    parser.add_argument("font", help="path to a UFO or a compiled font (TTF/OTF)")
+    parser.add_argument("-t", "--tolerance", type=float, default=None,
+                        help="tolerance in degrees (defaults to the font's own "
+                             "tolerance or the extension's setting)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of processes (defaults to number of cores)")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json",
+                        help="report format")
+    parser.add_argument("-o", "--output", default=None,
+                        help="report file (defaults to stdout)")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="also report segments that are parallel")
+    parser.add_argument("--fast", action="store_true",
+                        help="read outlines from the .glif files directly "
+                             "instead of opening the font (no cache)")
+    parser.add_argument("--components", action="store_true",
+                        help="check composite glyphs as if they were decomposed "
+                             "(implies --fast)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write cached results")
+    parser.add_argument("--cache-file", default=None,
+                        help="cache database (defaults to one in the user's cache folder)")
+    parser.add_argument("--since", default=None, metavar="REV",
+                        help="only check glyphs changed since this git revision, "
+                             "compared to the working tree (unstaged edits included)")
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument("--until", default=None, metavar="REV",
+                         help="with --since, compare to this revision "
+                              "instead of the working tree")
+    changes.add_argument("--cached", action="store_true",
+                         help="with --since, compare to the staged changes "
+                              "instead of the working tree")
+    parser.add_argument("-l", "--location", type=parseLocation, default=None,
+                        help="for variable compiled fonts, the instance to check "
+                             "(eg. wght=700,wdth=85)")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="keep checking glyphs as they're saved, until Ctrl-C")
+    return parser.parse_args(args)
+
+
+def parseLocation(text):
+    """
+    Turn "wght=700,wdth=85" into {"wght": 700.0, "wdth": 85.0}
+    """
+    location = {}
+    for item in text.split(","):
+        tag, separator, value = item.partition("=")
+        if not separator:
+            raise argparse.ArgumentTypeError("expected tag=value, got %r" % item)
+        location[tag.strip()] = float(value)
+    return location
+
+
+def main(args=None):
+    args = parseArgs(args)
+
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = readFontTolerance(args.font)
+
+    if args.since is not None:
+        return checkChanges(args, tolerance)
+    if args.watch:
+        return watchFont(args, tolerance)
+
+    if os.path.isfile(args.font):
+        results = auditBinary(args.font, tolerance, args.location)
+    elif args.fast or args.components:
+        results = auditUFO(args.font, tolerance, args.workers, args.components)
+    else:
+        results = _auditWithCache(args, tolerance)
+
+    if not args.all:
+        results = [result for result in results if not result["parallel"]]
+
+    _writeReport(args, results, tolerance)
+    return 0
+
+
+def _auditWithCache(args, tolerance):
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ResultCache(args.cache_file)
+        except (OSError, sqlite3.Error) as error:
+            print("Can't open cache, checking every glyph: %s" % error, file=sys.stderr)
+
+    results = auditFont(args.font, tolerance, args.workers, cache)
+    if cache is not None:
+        cache.close()
+    return results
+
+
+def checkChanges(args, tolerance):
+    """
+    --since mode: return 1 if changed glyphs have
+    new non-parallel segments, 0 if not, 2 if git failed
+    """
+    try:
+        until = INDEX if args.cached else args.until
+        results, newCount = auditChanges(args.font, args.since, until, tolerance)
+    except subprocess.CalledProcessError as error:
+        print("git failed: %s" % error.stderr.decode("utf-8", "replace").strip(), file=sys.stderr)
+        return 2
+
+    if not args.all:
+        results = [result for result in results if not result["parallel"]]
+    _writeReport(args, results, tolerance, DIFF_REPORT_FIELDS)
+
+    if newCount:
+        print("%d new non-parallel segment(s)" % newCount, file=sys.stderr)
+        return 1
+    return 0
+
+
+def watchFont(args, tolerance):
+    """
+    --watch mode: check every glyph, then only the ones that change
+    """
+    def reportChanges(watcher, glyphNames):
+        for glyphName in glyphNames:
+            results = watcher.results.get(glyphName)
+            if results is None:
+                print("%s: removed" % glyphName, file=sys.stderr)
+            else:
+                count = sum(not result["parallel"] for result in results)
+                print("%s: %d non-parallel segment(s)" % (glyphName, count), file=sys.stderr)
+        _writeWatchReport(args, watcher, tolerance)
+
+    watcher = GlyphWatcher(args.font, tolerance, onChange=reportChanges, components=args.components)
+    watcher.scan()
+    _writeWatchReport(args, watcher, tolerance)
+    print("Watching %s (Ctrl-C to stop)" % args.font, file=sys.stderr)
+    watcher.run()
+    return 0
+
+
+def _writeWatchReport(args, watcher, tolerance):
+    """
+    Write the whole table to the report file.
+    Without -o, only the changes are printed.
+    """
+    if args.output is None:
+        return
+    results = watcher.getAllResults()
+    if not args.all:
+        results = [result for result in results if not result["parallel"]]
+    _writeReport(args, results, tolerance)
+
+
+def _writeReport(args, results, tolerance, fieldNames=REPORT_FIELDS):
+    if args.output is None:
+        writeReport(results, sys.stdout, args.format, args.font, tolerance, fieldNames)
+    else:
+        with open(args.output, "w", newline="") as outFile:
+            writeReport(results, outFile, args.format, args.font, tolerance, fieldNames)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
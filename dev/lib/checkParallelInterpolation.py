@@ -0,0 +1,61 @@
+"""
+Command line check of handle parallelism in between masters.
+
+Samples a grid of locations over a designspace (or a TrueType
+variable font's gvar) and lists every segment that goes out of
+tolerance somewhere, with its worst angle deviation and where it is.
+
+    python checkParallelInterpolation.py MyFamily.designspace
+    python checkParallelInterpolation.py MyFamily-VF.ttf --steps 17 --format csv -o instances.csv
+"""
+import sys
+import argparse
+
+from comCheckParallelUtils.fontAudit import writeReport
+from comCheckParallelUtils.interpolationCheck import auditInterpolation, SAMPLE_REPORT_FIELDS
+
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Check if the lines connecting BCPs "
+                                                 "and oncurves stay parallel in between masters.")
+    parser.add_argument("font", help="path to a designspace or a TrueType variable font")
+    parser.add_argument("-t", "--tolerance", type=float, default=None,
+                        help="tolerance in degrees (defaults to the default master's "
+                             "own tolerance or the extension's setting)")
+    parser.add_argument("-s", "--steps", type=int, default=9,
+                        help="locations sampled along each axis")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json",
+                        help="report format")
+    parser.add_argument("-o", "--output", default=None,
+                        help="report file (defaults to stdout)")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="also report segments that stay within tolerance")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parseArgs(args)
+
+    try:
+        tolerance, sampleCount, results = auditInterpolation(args.font, args.tolerance, args.steps, args.all)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    print("%d locations sampled" % sampleCount, file=sys.stderr)
+    if results:
+        worst = max(results, key=lambda result: result["worstDeviation"])
+        print("Worst: %s contour %d segment %d, %s° at %s" % (worst["glyph"], worst["contour"], worst["segment"],
+                                                             worst["worstDeviation"], worst["worstLocation"]),
+              file=sys.stderr)
+
+    if args.output is None:
+        writeReport(results, sys.stdout, args.format, args.font, tolerance, SAMPLE_REPORT_FIELDS)
+    else:
+        with open(args.output, "w", newline="") as outFile:
+            writeReport(results, outFile, args.format, args.font, tolerance, SAMPLE_REPORT_FIELDS)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Command line check of a whole font library.
+
+Takes any number of UFOs, designspaces and folders (searched for both),
+checks every glyph of every font and writes one report.
+
+    python checkParallelLibrary.py ~/Fonts/Library --format csv -o library.csv
+
+Progress is saved to a checkpoint file as it goes. If the run is
+interrupted, running the same command again only checks what's left.
+The checkpoint is removed once the report has been written.
+"""
+import os
+import sys
+import argparse
+
+from comCheckParallelUtils.fontAudit import writeReport
+from comCheckParallelUtils.libraryAudit import findFonts, auditLibrary, getFontTolerances, LIBRARY_REPORT_FIELDS
+
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Check if the lines connecting BCPs "
+                                                 "and oncurves are parallel in many fonts.")
+    parser.add_argument("paths", nargs="+", help="UFOs, designspaces or folders")
+    parser.add_argument("-t", "--tolerance", type=float, default=None,
+                        help="tolerance in degrees (defaults to each font's own "
+                             "tolerance or the extension's setting)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of processes (defaults to number of cores)")
+    parser.add_argument("-s", "--shard-size", type=int, default=200,
+                        help="glyphs per shard")
+    parser.add_argument("-c", "--checkpoint", default="checkParallelLibrary.checkpoint.jsonl",
+                        help="checkpoint file to resume from")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json",
+                        help="report format")
+    parser.add_argument("-o", "--output", default=None,
+                        help="report file (defaults to stdout)")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="also report segments that are parallel")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parseArgs(args)
+
+    def printProgress(finishedShards, totalShards):
+        print("%d/%d shards" % (finishedShards, totalShards), file=sys.stderr)
+
+    fontPaths = findFonts(args.paths)
+    results = auditLibrary(fontPaths, args.tolerance, args.workers, args.shard_size,
+                           args.checkpoint, printProgress)
+    if not args.all:
+        results = [result for result in results if not result["parallel"]]
+
+    # The report header lists the tolerance each font was checked with
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = getFontTolerances(fontPaths)
+
+    if args.output is None:
+        writeReport(results, sys.stdout, args.format, fontPaths, tolerance, LIBRARY_REPORT_FIELDS)
+    else:
+        with open(args.output, "w", newline="") as outFile:
+            writeReport(results, outFile, args.format, fontPaths, tolerance, LIBRARY_REPORT_FIELDS)
+
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
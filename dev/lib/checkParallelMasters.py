@@ -0,0 +1,56 @@
+"""
+Command line check of parallel consistency across the masters
+of a designspace.
+
+Lists every segment that is parallel in some masters and not in
+others, with its angle deviation in each master and how far apart
+those are (spread).
+
+    python checkParallelMasters.py MyFamily.designspace
+    python checkParallelMasters.py MyFamily.designspace --tolerance 1.5 --format csv -o masters.csv
+
+Glyphs whose segments don't match in every master are listed
+on stderr; the segments they do share are still checked.
+"""
+import sys
+import argparse
+
+from comCheckParallelUtils.fontAudit import writeReport
+from comCheckParallelUtils.masterCheck import auditDesignspace, MASTER_REPORT_FIELDS
+
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Check if the lines connecting BCPs "
+                                                 "and oncurves are parallel in the same "
+                                                 "way in every master.")
+    parser.add_argument("designspace", help="path to a designspace")
+    parser.add_argument("-t", "--tolerance", type=float, default=None,
+                        help="tolerance in degrees (defaults to the default master's "
+                             "own tolerance or the extension's setting)")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json",
+                        help="report format")
+    parser.add_argument("-o", "--output", default=None,
+                        help="report file (defaults to stdout)")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="also report segments that are consistent")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parseArgs(args)
+
+    masterNames, tolerance, results, incompatible = auditDesignspace(args.designspace, args.tolerance, args.all)
+    if incompatible:
+        print("Segments don't match in every master: %s" % " ".join(incompatible), file=sys.stderr)
+
+    fieldNames = MASTER_REPORT_FIELDS + masterNames
+    if args.output is None:
+        writeReport(results, sys.stdout, args.format, args.designspace, tolerance, fieldNames)
+    else:
+        with open(args.output, "w", newline="") as outFile:
+            writeReport(results, outFile, args.format, args.designspace, tolerance, fieldNames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Batch versions of the parallel check in helperFuncs.
+
+Segments are packed into a NumPy array of shape (N, 4, 2):
+for each segment, the coordinates of
+    prevPt (oncurve), bcp 1, bcp 2, oncurve
+in that order, which is the order the points are drawn in.
+
+All N segments are then checked with a handful of array operations,
+instead of one areTheyParallel() call (and two atan2s) per segment.
+"""
+
+import math
+import numpy as np
+
+from comCheckParallelUtils.profiler import profiled
+
+# Index of each point in a packed segment
+PREV_PT, BCP_1, BCP_2, ON_PT = range(4)
+
+# Relative difference under which areTheyParallel() treats
+# a segment as sitting on the tolerance
+BOUNDARY_EPSILON = 1e-9
+
+def packSegments(segments):
+    """
+    Pack segments into an (N, 4, 2) array.
+
+    segments is a list of (prevPt, segment) tuples
+    (like DrawingDelegate._selectedSegments) where
+    segment contains 2 bcps and an oncurve pt.
+    """
+    coords = np.empty((len(segments), 4, 2), dtype=np.float64)
+    for i, (prevPt, segment) in enumerate(segments):
+        h1, h2, pt = segment
+        coords[i] = ((prevPt.x, prevPt.y), (h1.x, h1.y), (h2.x, h2.y), (pt.x, pt.y))
+    return coords
+
+def getVectors(coords):
+    """
+    Return the (N, 2) direction vectors of the lines
+    connecting oncurves and the lines connecting bcps
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    onCurveVectors = coords[:, ON_PT] - coords[:, PREV_PT]
+    bcpVectors = coords[:, BCP_2] - coords[:, BCP_1]
+    return onCurveVectors, bcpVectors
+
+def getSegmentVectors(coords):
+    """
+    Return (..., 2, 2) onCurve and bcp vectors of (..., 4, 2) packed segments,
+    for when the vectors are transformed or interpolated before being checked
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    return np.stack([coords[..., ON_PT, :] - coords[..., PREV_PT, :],
+                     coords[..., BCP_2, :] - coords[..., BCP_1, :]], axis=-2)
+
+@profiled("batchFuncs.getAngleDeviations", lambda args, result: len(result))
+def getAngleDeviations(coords):
+    """
+    Return an (N,) array of angle deviations in degrees,
+    the same value helperFuncs.getAngleDeviation() gives
+    for each segment.
+    """
+    return getVectorDeviations(*getVectors(coords))
+
+def getVectorDeviations(onCurveVectors, bcpVectors):
+    """
+    Same as getAngleDeviations(), from the direction vectors
+    (see getVectors()) instead of the points. Vectors can have
+    any number of leading dimensions, as long as the last one is (x, y).
+    """
+    angle1 = np.abs(np.arctan2(onCurveVectors[..., 1], onCurveVectors[..., 0]) * 180 / np.pi)
+    angle2 = np.abs(np.arctan2(bcpVectors[..., 1], bcpVectors[..., 0]) * 180 / np.pi)
+    return np.abs(angle1 - angle2)
+
+def checkSegments(coords, tolerance=0):
+    """
+    Return deviations and a boolean mask of which segments
+    are parallel (deviation <= tolerance)
+    """
+    deviations = getAngleDeviations(coords)
+    return deviations, deviations <= tolerance
+
+@profiled("batchFuncs.areTheyParallel", lambda args, result: len(result))
+def areTheyParallel(coords, tolerance=0):
+    """
+    Return a boolean mask of which segments are parallel,
+    without any trig on the segments.
+
+    helperFuncs.areTheyParallel() compares abs(atan2(dy, dx)) of each line,
+    which is the same as flipping each vector into the upper half
+    (dx, abs(dy)) and measuring the angle between the two vectors.
+    For two vectors in the upper half, that angle is <= tolerance when
+    their dot product is positive and cross**2 <= tan(tolerance)**2 * dot**2
+
+    tan() rounds (tan(45°) isn't exactly 1), so segments within a hair
+    of the tolerance are checked again with the same atan2 math as
+    checkSegments(), and exactly-at-tolerance segments agree with it.
+    """
+    if tolerance >= 90:
+        return checkSegments(coords, tolerance)[1]
+
+    onCurveVectors, bcpVectors = getVectors(coords)
+    x1 = onCurveVectors[:, 0]
+    y1 = np.abs(onCurveVectors[:, 1])
+    x2 = bcpVectors[:, 0]
+    y2 = np.abs(bcpVectors[:, 1])
+
+    # atan2(0, 0) is 0, so zero-length lines point along the x axis
+    zero1 = (x1 == 0) & (y1 == 0)
+    zero2 = (x2 == 0) & (y2 == 0)
+    x1 = np.where(zero1, 1.0, x1)
+    x2 = np.where(zero2, 1.0, x2)
+
+    dot = x1 * x2 + y1 * y2
+    cross = x1 * y2 - y1 * x2
+    tanTolerance = math.tan(math.radians(tolerance))
+    crossSquared = cross * cross
+    limit = tanTolerance * tanTolerance * dot * dot
+    parallel = (dot > 0) & (crossSquared <= limit)
+
+    boundary = (dot > 0) & (np.abs(crossSquared - limit) <= BOUNDARY_EPSILON * (crossSquared + limit))
+    if boundary.any():
+        parallel[boundary] = getVectorDeviations(onCurveVectors[boundary], bcpVectors[boundary]) <= tolerance
+    return parallel
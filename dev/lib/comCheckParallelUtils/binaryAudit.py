@@ -0,0 +1,101 @@
+"""
+Check compiled fonts (TTF/OTF, glyf, CFF or CFF2 outlines)
+with fontTools, without converting them back to UFOs.
+
+Glyphs are drawn into a SegmentPackingPen, which walks each contour
+into segments the same way fontParts does (see glifReader) and packs
+the curve segments as the contour is drawn, so the whole font ends
+up in one packed array for a single batched check.
+
+TrueType (glyf) composites are drawn as components, which the pen
+decomposes by drawing the base glyph through the component's
+transformation. Their contours are numbered after the glyph's own,
+in component order, like checkParallelAudit.py --components does.
+"""
+
+import numpy as np
+from fontTools.ttLib import TTFont
+from fontTools.pens.pointPen import AbstractPointPen, SegmentToPointPen
+from fontTools.pens.transformPen import TransformPen
+
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.glifReader import findCurveSegments
+
+class SegmentPackingPen(AbstractPointPen):
+    """
+    Point pen collecting the curve segments of every glyph drawn into it.
+    Call beginGlyph() before drawing each glyph. Segment pens
+    (glyph.draw()) can draw into getSegmentPen().
+
+    glyphSet is where components' base glyphs are looked up.
+    """
+    def __init__(self, glyphSet=None):
+        self.glyphSet = glyphSet
+        # [(glyphName, contourIndex, segmentIndex), ...]
+        self.keys = []
+        # Flat prevPt, bcp 1, bcp 2, oncurve coordinates
+        self._values = []
+        self._glyphName = None
+        self._contourIndex = 0
+        self._points = None
+
+    def beginGlyph(self, glyphName):
+        self._glyphName = glyphName
+        self._contourIndex = 0
+
+    def getSegmentPen(self):
+        return SegmentToPointPen(self)
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._points = []
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self._points.append((segmentType or "offcurve", pt[0], pt[1]))
+
+    def endPath(self):
+        for segmentIndex, prevPt, (bcp1, bcp2, pt) in findCurveSegments(self._points):
+            self.keys.append((self._glyphName, self._contourIndex, segmentIndex))
+            self._values.extend((prevPt[1], prevPt[2], bcp1[1], bcp1[2], bcp2[1], bcp2[2], pt[1], pt[2]))
+        self._contourIndex += 1
+        self._points = None
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        """
+        Draw the base glyph decomposed. Nested components come back
+        here with their transformations already combined by TransformPen.
+        """
+        if self.glyphSet is None or baseGlyphName not in self.glyphSet:
+            return
+        self.glyphSet[baseGlyphName].draw(TransformPen(self.getSegmentPen(), transformation))
+
+    def getCoords(self):
+        """
+        Return the (N, 4, 2) packed segments, in the order of keys
+        """
+        return np.array(self._values, dtype=np.float64).reshape(-1, 4, 2)
+
+def auditBinary(fontPath, tolerance, location=None):
+    """
+    Check every glyph of a compiled font and return
+    a list of segment results (see fontAudit.makeResults()),
+    in glyph order.
+
+    location is a {axis tag: value} user space location
+    for variable fonts (defaults to the default instance).
+    Composite glyphs are checked decomposed (see SegmentPackingPen).
+    """
+    font = TTFont(fontPath, lazy=True)
+    glyphSet = font.getGlyphSet(location=location)
+    pen = SegmentPackingPen(glyphSet)
+    segmentPen = pen.getSegmentPen()
+    for glyphName in font.getGlyphOrder():
+        pen.beginGlyph(glyphName)
+        glyphSet[glyphName].draw(segmentPen)
+
+    deviations = bf.getAngleDeviations(pen.getCoords()).tolist()
+    return [{"glyph": glyphName,
+             "contour": contourIndex,
+             "segment": segmentIndex,
+             "deviation": round(deviation, 4),
+             "parallel": deviation <= tolerance}
+            for (glyphName, contourIndex, segmentIndex), deviation in zip(pen.keys, deviations)]
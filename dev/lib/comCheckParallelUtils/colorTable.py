@@ -0,0 +1,135 @@
+"""
+Gradated colors for guides, so they're less "right" vs. "wrong".
+
+Colors are computed once into a lookup table. Deviations are turned
+into indices into the table with a few array operations,
+so there's no per-segment branching when drawing.
+
+Colors only ever get redder as the deviation grows, so each color
+starts at a threshold deviation. For deviations that are already
+sorted (see DeviationIndex), each color is a contiguous run found
+with one binary search, without looking at the deviations one by one.
+"""
+
+import numpy as np
+
+# Thresholds are never more than a few floats off (see _nudgeThresholds())
+MAX_NUDGES = 8
+
+class GradientColorTable:
+    """
+    The first half of the table goes from blue (exactly parallel)
+    to violet (right at the tolerance), the second half from
+    magenta (just outside the tolerance) to red (way off).
+    """
+    def __init__(self, steps=16,
+                 passColors=((0, 0, 1, 1), (0.55, 0, 1, 1)),
+                 failColors=((1, 0, 0.55, 1), (1, 0, 0, 1)),
+                 minFailSpan=1):
+        self.halfSteps = max(steps // 2, 1)
+        # Fail colors are spread over at least this many degrees,
+        # so they still gradate when tolerance is (close to) 0
+        self.minFailSpan = minFailSpan
+        self.colors = self._makeRamp(*passColors) + self._makeRamp(*failColors)
+
+    def getThresholds(self, tolerance):
+        """
+        Return (passThresholds, failThresholds), the deviations
+        where pass colors 1, 2, ... and fail colors 1, 2, ...
+        (counted from the start of each half) begin.
+        Pass colors split the tolerance evenly, fail colors
+        split the failSpan past it.
+
+        Each threshold is the first float that getColorIndices()
+        gives that color, so thresholds and indices never disagree
+        on deviations that land right on a step.
+        """
+        steps = np.arange(1, self.halfSteps, dtype=np.float64)
+        if tolerance > 0:
+            passThresholds = self._nudgeThresholds(steps * (tolerance / self.halfSteps), steps,
+                                                   lambda deviations: self._getPassIndices(deviations, tolerance))
+        else:
+            # Nothing but exactly parallel passes, always in the first color
+            passThresholds = np.full(len(steps), np.inf)
+
+        failThresholds = self._nudgeThresholds(tolerance + steps * (self._getFailSpan(tolerance) / self.halfSteps),
+                                               self.halfSteps + steps,
+                                               lambda deviations: self._getFailIndices(deviations, tolerance))
+        return passThresholds, failThresholds
+
+    def getColorIndices(self, deviations, tolerance):
+        """
+        Return an array of indices into self.colors for an array of
+        deviations. A deviation <= tolerance always gets a pass color.
+        """
+        deviations = np.asarray(deviations, dtype=np.float64)
+        if tolerance > 0:
+            passIndices = self._getPassIndices(deviations, tolerance)
+        else:
+            passIndices = np.zeros_like(deviations)
+        failIndices = self._getFailIndices(deviations, tolerance)
+        return np.where(deviations <= tolerance, passIndices, failIndices).astype(np.intp)
+
+    def getColorEdges(self, sortedDeviations, tolerance):
+        """
+        Return the (len(self.colors) + 1,) edges of each color in
+        deviations sorted in increasing order: color i is
+        sortedDeviations[edges[i]:edges[i + 1]] (the same colors
+        getColorIndices() gives). Only binary searches, one per color.
+        """
+        passThresholds, failThresholds = self.getThresholds(tolerance)
+        toleranceEdge = np.searchsorted(sortedDeviations, tolerance, side="right")
+        passEdges = np.minimum(np.searchsorted(sortedDeviations, passThresholds, side="left"), toleranceEdge)
+        failEdges = np.maximum(np.searchsorted(sortedDeviations, failThresholds, side="left"), toleranceEdge)
+        return np.concatenate([[0], passEdges, [toleranceEdge], failEdges, [len(sortedDeviations)]]).astype(np.intp)
+
+    def _getFailSpan(self, tolerance):
+        return max(tolerance, self.minFailSpan)
+
+    def _getPassIndices(self, deviations, tolerance):
+        """
+        Return the color index of each deviation, before rounding
+        down, meant for deviations <= tolerance
+        """
+        return np.minimum(deviations * (self.halfSteps / tolerance), self.halfSteps - 1)
+
+    def _getFailIndices(self, deviations, tolerance):
+        """
+        Return the color index of each deviation, before rounding
+        down, meant for deviations > tolerance
+        """
+        failSpan = self._getFailSpan(tolerance)
+        return self.halfSteps + np.minimum((deviations - tolerance) * (self.halfSteps / failSpan), self.halfSteps - 1)
+
+    def _nudgeThresholds(self, thresholds, indices, getIndices):
+        """
+        Move each threshold to the first float where getIndices()
+        reaches its index. The thresholds are worked out with
+        different rounding than getIndices(), so they can be
+        a few floats off on either side.
+        """
+        thresholds = thresholds.copy()
+        for _ in range(MAX_NUDGES):
+            low = getIndices(thresholds) < indices
+            if not low.any():
+                break
+            thresholds[low] = np.nextafter(thresholds[low], np.inf)
+        for _ in range(MAX_NUDGES):
+            below = np.nextafter(thresholds, -np.inf)
+            high = getIndices(below) >= indices
+            if not high.any():
+                break
+            thresholds[high] = below[high]
+        return thresholds
+
+    def _makeRamp(self, startColor, endColor):
+        """
+        Return halfSteps colors from startColor to endColor
+        """
+        if self.halfSteps == 1:
+            return [tuple(startColor)]
+        ramp = []
+        for step in range(self.halfSteps):
+            factor = step / (self.halfSteps - 1)
+            ramp.append(tuple(start + (end - start) * factor for start, end in zip(startColor, endColor)))
+        return ramp
@@ -0,0 +1,159 @@
+"""
+Check composite glyphs without decomposing them.
+
+A component's curve segments are its base glyph's segments moved
+through the component's transformation. The parallel check only
+looks at the direction vectors of each segment (see batchFuncs),
+and those only go through the linear part of the transformation,
+so the vectors of a base glyph are worked out once and every
+component using it just multiplies them by a 2x2 matrix.
+
+The deviations themselves only carry over as they are when the
+transformation keeps every angle the way helperFuncs measures it
+(offsets, uniform scale, flipping upside down). Anything else
+(non-uniform scale, skew, rotation, flipping sideways) checks
+the transformed vectors again.
+
+Contours of components are numbered after the glyph's own
+contours, in component order, the way they are once decomposed
+(fontParts and ufo2ft decompose the same way).
+"""
+
+import numpy as np
+
+import comCheckParallelUtils.batchFuncs as bf
+
+IDENTITY = (1, 0, 0, 1, 0, 0)
+
+def getMatrix(transformation):
+    """
+    Return the 2x2 matrix of the linear part of a
+    (xx, xy, yx, yy, dx, dy) transformation, for row vectors:
+    transformed = vectors @ matrix
+    """
+    xx, xy, yx, yy = transformation[:4]
+    return np.array([[xx, xy], [yx, yy]], dtype=np.float64)
+
+def keepsDeviations(transformation):
+    """
+    Return True if segments keep their angle deviations
+    through this transformation
+    """
+    xx, xy, yx, yy = transformation[:4]
+    return xy == 0 and yx == 0 and xx > 0 and abs(yy) == xx
+
+def transformVectors(vectors, transformation):
+    """
+    Return (..., 2, 2) segment vectors (see batchFuncs.getSegmentVectors())
+    through the linear part of a transformation
+    """
+    return vectors @ getMatrix(transformation)
+
+class ComponentResolver:
+    """
+    Segment results of glyphs made of contours and components.
+
+    Give each glyph's own segments with setGlyph(), then resolve()
+    any glyph to get the segments of its decomposed outline.
+    Resolved glyphs are kept until they, or a glyph they use
+    (directly or through nested components), are set again.
+    """
+    def __init__(self):
+        # {glyphName: (contourCount, indices, vectors, deviations, components)}
+        self._glyphs = {}
+        # {glyphName: (contourCount, indices, vectors, deviations)}
+        self._resolved = {}
+        # {baseGlyph: {names of glyphs with a component of it}}
+        self._users = {}
+        # Glyphs being resolved, to stop at components that use themselves
+        self._resolving = set()
+
+    def setGlyph(self, glyphName, contourCount, indices, vectors, deviations, components=()):
+        """
+        Set a glyph's own segments:
+
+        contourCount: number of contours in the glyph itself
+        indices: (n, 2) contour and segment index of each segment
+        vectors: (n, 2, 2) segment vectors (see batchFuncs.getSegmentVectors())
+        deviations: (n,) angle deviations
+        components: [(baseGlyph, (xx, xy, yx, yy, dx, dy)), ...]
+        """
+        self.removeGlyph(glyphName)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1, 2)
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 2, 2)
+        deviations = np.asarray(deviations, dtype=np.float64).reshape(-1)
+        components = list(components)
+        self._glyphs[glyphName] = (contourCount, indices, vectors, deviations, components)
+        for baseGlyph, transformation in components:
+            self._users.setdefault(baseGlyph, set()).add(glyphName)
+
+    def __contains__(self, glyphName):
+        return glyphName in self._glyphs
+
+    def removeGlyph(self, glyphName):
+        """
+        Forget a glyph, and the resolved results of every glyph using it
+        """
+        self._invalidate(glyphName)
+        glyph = self._glyphs.pop(glyphName, None)
+        if glyph is not None:
+            for baseGlyph, transformation in glyph[-1]:
+                self._users.get(baseGlyph, set()).discard(glyphName)
+
+    def getUsers(self, glyphName):
+        """
+        Return the names of every glyph using glyphName
+        as a component, directly or not
+        """
+        users = set()
+        stack = [glyphName]
+        while stack:
+            for user in self._users.get(stack.pop(), ()):
+                if user not in users:
+                    users.add(user)
+                    stack.append(user)
+        return users
+
+    def resolve(self, glyphName):
+        """
+        Return (contourCount, indices, vectors, deviations)
+        of the glyph with all its components decomposed.
+        Components of missing glyphs are left out.
+        """
+        resolved = self._resolved.get(glyphName)
+        if resolved is not None:
+            return resolved
+
+        contourCount, indices, vectors, deviations, components = self._glyphs[glyphName]
+        if components:
+            allIndices = [indices]
+            allVectors = [vectors]
+            allDeviations = [deviations]
+            self._resolving.add(glyphName)
+            try:
+                for baseGlyph, transformation in components:
+                    if baseGlyph not in self._glyphs or baseGlyph in self._resolving:
+                        continue
+                    baseCount, baseIndices, baseVectors, baseDeviations = self.resolve(baseGlyph)
+                    if tuple(transformation[:4]) != IDENTITY[:4]:
+                        baseVectors = transformVectors(baseVectors, transformation)
+                        if not keepsDeviations(transformation):
+                            baseDeviations = bf.getVectorDeviations(baseVectors[:, 0], baseVectors[:, 1])
+                    allIndices.append(baseIndices + (contourCount, 0))
+                    allVectors.append(baseVectors)
+                    allDeviations.append(baseDeviations)
+                    contourCount += baseCount
+            finally:
+                self._resolving.discard(glyphName)
+            indices = np.concatenate(allIndices)
+            vectors = np.concatenate(allVectors)
+            deviations = np.concatenate(allDeviations)
+
+        resolved = (contourCount, indices, vectors, deviations)
+        self._resolved[glyphName] = resolved
+        return resolved
+
+    def _invalidate(self, glyphName):
+        self._resolved.pop(glyphName, None)
+        for user in self.getUsers(glyphName):
+            self._resolved.pop(user, None)
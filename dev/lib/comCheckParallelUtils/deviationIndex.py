@@ -0,0 +1,55 @@
+"""
+Curve segments sorted by angle deviation, for drawing.
+
+Deviations don't depend on the tolerance, so segments are checked
+and sorted once per glyph change. A tolerance change (eg. scrubbing
+the accuracy slider) then only moves the edges between colors,
+which are found with a binary search per color (see colorTable),
+instead of checking or coloring every segment again.
+"""
+
+import numpy as np
+
+import comCheckParallelUtils.batchFuncs as bf
+
+class DeviationIndex:
+    """
+    lines: [prevPt, bcp1, bcp2, oncurve] coordinates of each segment
+    deviations: their angle deviations, in increasing order
+    (lines are in the same order)
+    """
+    def __init__(self, coords):
+        deviations = bf.getAngleDeviations(coords)
+        order = np.argsort(deviations, kind="stable")
+        self.deviations = deviations[order]
+        self.lines = coords[order].tolist()
+        # (colorTable, tolerance, buckets) of the last getBuckets()
+        self._buckets = None
+
+    def __len__(self):
+        return len(self.lines)
+
+    def countNotParallel(self, tolerance):
+        """
+        Return how many segments are out of tolerance
+        """
+        return len(self.deviations) - int(np.searchsorted(self.deviations, tolerance, side="right"))
+
+    def getBuckets(self, colorTable, tolerance):
+        """
+        Return [(colorIndex, lines), ...] for every color of
+        colorTable that has lines at this tolerance.
+        Kept until the tolerance (or colorTable) changes,
+        so redraws don't do anything but draw.
+        """
+        if self._buckets is not None:
+            lastTable, lastTolerance, buckets = self._buckets
+            if lastTable is colorTable and lastTolerance == tolerance:
+                return buckets
+
+        edges = colorTable.getColorEdges(self.deviations, tolerance).tolist()
+        buckets = [(colorIndex, self.lines[start:end])
+                   for colorIndex, (start, end) in enumerate(zip(edges[:-1], edges[1:]))
+                   if end > start]
+        self._buckets = (colorTable, tolerance, buckets)
+        return buckets
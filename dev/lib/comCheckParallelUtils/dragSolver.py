@@ -0,0 +1,94 @@
+"""
+Math for dragging the line connecting BCPs.
+
+Each bcp slides along its own handle (the line from its oncurve
+through the bcp). Everything that only depends on where the points
+were at mouseDown is worked out once, so each drag event is only
+a few multiplications and additions.
+"""
+
+import math
+
+class HandleDragSolver:
+    """
+    Solve new bcp positions for a drag of (dx, dy) from mouseDown.
+    All points are (x, y) tuples, as they were at mouseDown.
+
+    With snap on, the connection line locks parallel to the line
+    connecting the oncurves whenever it comes within tolerance.
+    """
+    def __init__(self, prevPt, bcp1, bcp2, pt, tolerance=0, snap=False):
+        self.origin1 = bcp1
+        self.origin2 = bcp2
+        self.direction1 = self._getUnitVector(prevPt, bcp1)
+        self.direction2 = self._getUnitVector(pt, bcp2)
+
+        self.snap = snap and tolerance < 90
+        self.isSnapped = False
+        if not self.snap:
+            return
+
+        chordX = pt[0] - prevPt[0]
+        chordY = pt[1] - prevPt[1]
+        self.chord = (chordX, chordY)
+        tanTolerance = math.tan(math.radians(tolerance))
+        self.tanToleranceSquared = tanTolerance * tanTolerance
+
+        # bcp2 = origin2 + t * direction2 is on the line through bcp1
+        # parallel to the chord when cross(bcp2 - bcp1, chord) == 0,
+        # which solves to t = (cross(bcp1, chord) - cross(origin2, chord)) / cross(direction2, chord)
+        self.crossDirection2 = self.direction2[0] * chordY - self.direction2[1] * chordX
+        self.crossOrigin2 = bcp2[0] * chordY - bcp2[1] * chordX
+
+    def solve(self, dx, dy):
+        """
+        Return new ((x1, y1), (x2, y2)) bcp positions,
+        unrounded, for a drag of (dx, dy) from mouseDown
+        """
+        o1x, o1y = self.origin1
+        u1x, u1y = self.direction1
+        o2x, o2y = self.origin2
+        u2x, u2y = self.direction2
+
+        # Project the drag onto each handle
+        t1 = dx * u1x + dy * u1y
+        t2 = dx * u2x + dy * u2y
+        x1 = o1x + t1 * u1x
+        y1 = o1y + t1 * u1y
+        x2 = o2x + t2 * u2x
+        y2 = o2y + t2 * u2y
+
+        self.isSnapped = False
+        if self.snap and self.crossDirection2 != 0 and self._isWithinTolerance(x2 - x1, y2 - y1):
+            chordX, chordY = self.chord
+            t2 = (x1 * chordY - y1 * chordX - self.crossOrigin2) / self.crossDirection2
+            x2 = o2x + t2 * u2x
+            y2 = o2y + t2 * u2y
+            self.isSnapped = True
+
+        return (x1, y1), (x2, y2)
+
+    def _isWithinTolerance(self, lineX, lineY):
+        """
+        Trig-free version of hf.areTheyParallel() for the
+        connection line against the chord (see batchFuncs.areTheyParallel())
+        """
+        chordX, chordY = self.chord
+        chordY = abs(chordY)
+        lineY = abs(lineY)
+        dot = lineX * chordX + lineY * chordY
+        cross = lineX * chordY - lineY * chordX
+        return dot > 0 and cross * cross <= self.tanToleranceSquared * dot * dot
+
+    def _getUnitVector(self, start, end):
+        """
+        Return unit vector from start to end,
+        or (0, 0) if they're on top of each other
+        (a bcp sitting on its oncurve doesn't move)
+        """
+        x = end[0] - start[0]
+        y = end[1] - start[1]
+        length = math.hypot(x, y)
+        if length == 0:
+            return (0, 0)
+        return (x / length, y / length)
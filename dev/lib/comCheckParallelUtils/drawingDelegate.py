@@ -2,12 +2,17 @@
 Delegate object for drawing
 """
 
-import os.path
+import time
 import mojo.drawingTools as dt
 import comCheckParallelUtils.helperFuncs as hf
-
-currentDir = os.path.dirname(__file__)
-settingDir = os.path.join(currentDir, "..", "..", "resources", "toleranceSetting.txt")
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.selectionCache import SelectionCache
+from comCheckParallelUtils.pointIndex import PointIndex
+from comCheckParallelUtils.lineIndex import ConnectionLineIndex
+from comCheckParallelUtils.toleranceSettings import toleranceSettings
+from comCheckParallelUtils.colorTable import GradientColorTable
+from comCheckParallelUtils.deviationIndex import DeviationIndex
+from comCheckParallelUtils.profiler import profiled
 
 class DrawingDelegate:
     """
@@ -15,10 +20,24 @@ class DrawingDelegate:
     and EditParallelTool() to analyze segments and draw lines
     """
     def __init__(self):
-        self.tolerance = hf.readSetting(settingDir)
+        self.tolerance = toleranceSettings.getTolerance()
         self.scale = None
         self._selectedSegments = []
+        self._cache = SelectionCache()
+
+        # (prevPt, segment) whose connection line is under the cursor
+        self.hoveredSegment = None
+
+        # Show every curve segment in the glyph, not only selected ones
+        self.showAllSegments = False
+
+        self.colorTable = GradientColorTable()
+
+        # FrameStats when diagnostics are on, None otherwise
+        self.frameStats = None
+        self._cacheHit = True
 
+    @profiled("DrawingDelegate.draw", lambda args, result: len(args[0]._selectedSegments))
     def draw(self, infoOrScale, glyph=None, lineWeightMultiplier=1):
         """
         Draw lines.
@@ -41,29 +60,128 @@ class DrawingDelegate:
         if self.scale is None or glyph is None:
             return
 
+        if self.frameStats is not None:
+            start = time.perf_counter()
+            self._cacheHit = True
+        segmentCount = 0
+
+        # Fonts can have their own tolerance
+        self.tolerance = toleranceSettings.getTolerance(glyph.font)
+
+        if self.showAllSegments:
+            overlay = self._getGlyphOverlay(glyph)
+            self._drawLines(overlay)
+            segmentCount += len(overlay)
+
         # Also do this here in case mouseDown isn't fired
-        # (eg. user uses keyboard to select segments)
+        # (eg. user uses keyboard to select segments).
+        # Cached until the glyph or its selection changes.
         self._analyzeSelection(glyph)
+        selectionLines = self._getSelectionLines(glyph)
+        self._drawLines(selectionLines, lineWeightMultiplier)
+        segmentCount += len(selectionLines)
+
+        # Hovered connection line is highlighted,
+        # whether its segment is selected or not
+        if self.hoveredSegment is not None:
+            self._drawLines(DeviationIndex(bf.packSegments([self.hoveredSegment])), 4)
+
+        if self.frameStats is not None:
+            self.frameStats.addFrame(time.perf_counter() - start, segmentCount, self._cacheHit)
+
+    def _drawLines(self, deviationIndex, lineWeightMultiplier=1):
+        """
+        Draw lines connecting oncurves and lines connecting bcps
+        of the segments in a DeviationIndex.
+
+        Colors come from self.colorTable, from blue (parallel)
+        to red (way off). Each color's bucket of lines is drawn
+        as one path, so the number of drawing state changes doesn't
+        grow with the number of segments. Segments are sorted by
+        deviation, so buckets are only worked out again (with a binary
+        search per color) when the tolerance changes.
+        """
+        if not len(deviationIndex):
+            return
+
+        dt.fill(None)
+        for colorIndex, bucketLines in deviationIndex.getBuckets(self.colorTable, self.tolerance):
+            dt.stroke(*self.colorTable.colors[colorIndex])
 
-        for selected in self._selectedSegments:
-            p1, segment = selected
-            h1, h2, p2 = segment
-            if hf.areTheyParallel((p1, p2,), (h1, h2), self.tolerance):
-                dt.stroke(0, 0, 1, 1)
-            else:
-                dt.stroke(1, 0, 0, 1)
             dt.strokeWidth(self.scale)
-            dt.line((p1.x, p1.y), (p2.x, p2.y))
+            dt.newPath()
+            for p1, h1, h2, p2 in bucketLines:
+                dt.moveTo(p1)
+                dt.lineTo(p2)
+            dt.drawPath()
+
             dt.strokeWidth(self.scale * lineWeightMultiplier)
-            dt.line((h1.x, h1.y), (h2.x, h2.y))
+            dt.newPath()
+            for p1, h1, h2, p2 in bucketLines:
+                dt.moveTo(h1)
+                dt.lineTo(h2)
+            dt.drawPath()
 
+    def readToleranceSetting(self, font=None):
+        """
+        Get tolerance setting (kept in memory by toleranceSettings)
+        """
+        self.tolerance = toleranceSettings.getTolerance(font)
+
+    def _getGlyphOverlay(self, glyph):
+        """
+        Return a DeviationIndex of every curve segment in the glyph.
+
+        All segments are checked in one batch, and the result
+        is cached until the glyph changes, so redraws (and tolerance
+        changes) don't redo any geometry.
+        """
+        entry = self._cache.getEntry(glyph)
+        overlay = entry.get("overlay")
+        if overlay is None:
+            self._cacheHit = False
+            segments = []
+            for contour in glyph:
+                for segmentIndex, prevPt, segment in hf.findCurveSegments(contour):
+                    segments.append((prevPt, segment))
+            overlay = DeviationIndex(bf.packSegments(segments))
+            entry["overlay"] = overlay
+        return overlay
 
-    def readToleranceSetting(self):
+    def _getSelectionLines(self, glyph):
         """
-        Read tolerance setting from file
+        Return a DeviationIndex of self._selectedSegments,
+        like _getGlyphOverlay(). Cached until the glyph
+        or its selection changes.
+        """
+        entry = self._cache.getEntry(glyph)
+        selectionLines = entry.get("selectionLines")
+        if selectionLines is None:
+            self._cacheHit = False
+            selectionLines = DeviationIndex(bf.packSegments(self._selectedSegments))
+            entry["selectionLines"] = selectionLines
+        return selectionLines
+
+    @profiled("DrawingDelegate.findConnectionLine")
+    def findConnectionLine(self, glyph, point):
+        """
+        Return (prevPt, segment) of any curve segment whose
+        connection line is under point (an (x, y) tuple), or None.
+
+        Uses a ConnectionLineIndex of the glyph,
+        which is cached until the glyph changes.
         """
-        self.tolerance = hf.readSetting(settingDir)
+        if self.scale is None:
+            return None
 
+        entry = self._cache.getEntry(glyph)
+        lineIndex = entry.get("lineIndex")
+        if lineIndex is None:
+            lineIndex = ConnectionLineIndex(glyph)
+            entry["lineIndex"] = lineIndex
+        return lineIndex.findLine(point, self.scale)
+
+    @profiled("DrawingDelegate._analyzeSelection", lambda args, result: len(args[0]._selectedSegments))
     def _analyzeSelection(self, glyph):
         """
         Look at what's selected and add appropriate segment(s)
@@ -74,6 +192,32 @@ class DrawingDelegate:
         [(prevPt, segment), (prevPt, segment), (prevPt, segment)]
 
         segment is an object that contains 2 bcps and an oncurve pt
+
+        The result is cached per glyph and reused until
+        the glyph or its selection changes.
+        """
+        entry = self._cache.getEntry(glyph)
+        selection = entry.get("selection")
+        if selection is None:
+            self._cacheHit = False
+            # Neighbors of each point only change when the glyph does
+            pointIndex = entry.get("pointIndex")
+            if pointIndex is None:
+                pointIndex = PointIndex(glyph)
+                entry["pointIndex"] = pointIndex
+
+            selection = self._findSelectedSegments(glyph, pointIndex)
+            entry["selection"] = selection
+
+        self._selectedSegments = selection
+
+    def _findSelectedSegments(self, glyph, pointIndex):
+        """
+        Walk every contour of the glyph and return
+        a list of selected (prevPt, segment) tuples.
+
+        pointIndex is a PointIndex of the glyph, used
+        to look up neighbors of selected points
         """
         # Find which segments in each contour are selected
         selection = []
@@ -100,7 +244,7 @@ class DrawingDelegate:
                             # a segment has been selected, and it's been taken care of above
                             # This prevents 2 segments from being selected when user
                             # selects a segment.
-                            if prevPt.selected or hf.findNextPt(point, contour).selected:
+                            if prevPt.selected or pointIndex.nextPt(point).selected:
                                 continue
 
                             try:
@@ -113,5 +257,4 @@ class DrawingDelegate:
                             if nextSegment.type in ["curve", "qcurve"]:
                                 selection.append((point, nextSegment))
 
-        if selection != self._selectedSegments:
-            self._selectedSegments = selection
+        return selection
@@ -0,0 +1,309 @@
+"""
+Check every curve segment of every glyph in a font,
+outside of RoboFont.
+
+Glyphs are spread out over a pool of processes.
+Each process opens its own copy of the font, so only
+glyph names and results are passed back and forth.
+
+With a ResultCache, glyphs whose contours haven't changed
+since they were last checked are read from the cache instead.
+Workers only read from the cache; new entries are sent back
+and written by the main process once all glyphs are done.
+"""
+
+import os
+import csv
+import json
+import plistlib
+import multiprocessing
+import numpy as np
+
+from fontParts.world import OpenFont
+import comCheckParallelUtils.helperFuncs as hf
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.toleranceSettings import toleranceSettings, LIB_KEY
+from comCheckParallelUtils.resultCache import ResultCache, getGeometryHash
+from comCheckParallelUtils.glifReader import getGlyphFiles, packGlyphs, packGlyphOutlines
+from comCheckParallelUtils.componentFuncs import ComponentResolver
+from comCheckParallelUtils.sharedArrays import SharedArray
+
+REPORT_FIELDS = ["glyph", "contour", "segment", "deviation", "parallel"]
+
+# Font (and cache) opened by each worker process
+_workerFont = None
+_workerCache = None
+
+# A curve segment adds at least 3 <point x="0" y="0"/>
+# to a .glif, so a file can't hold more segments than this
+MIN_SEGMENT_BYTES = 60
+
+def analyzeGlyph(glyph):
+    """
+    Return [(contourIndex, segmentIndex, deviation), ...]
+    for all curve segments of a glyph.
+
+    Segments are packed and checked in one batch.
+    """
+    indices = []
+    segments = []
+    for contourIndex, contour in enumerate(glyph):
+        for segmentIndex, prevPt, segment in hf.findCurveSegments(contour):
+            indices.append((contourIndex, segmentIndex))
+            segments.append((prevPt, segment))
+
+    if not segments:
+        return []
+
+    deviations = bf.getAngleDeviations(bf.packSegments(segments))
+    return [(contourIndex, segmentIndex, deviation)
+            for (contourIndex, segmentIndex), deviation in zip(indices, deviations.tolist())]
+
+def makeResults(glyphName, segments, tolerance):
+    """
+    Turn analyzeGlyph() output into a list of dicts,
+    one per segment, with the keys in REPORT_FIELDS
+    """
+    return [{"glyph": glyphName,
+             "contour": contourIndex,
+             "segment": segmentIndex,
+             "deviation": round(deviation, 4),
+             "parallel": deviation <= tolerance}
+            for contourIndex, segmentIndex, deviation in segments]
+
+def auditGlyph(glyph, tolerance):
+    """
+    Check all curve segments of a glyph and return a list of dicts,
+    one per segment, with the keys in REPORT_FIELDS.
+    """
+    return makeResults(glyph.name, analyzeGlyph(glyph), tolerance)
+
+def _analyzeCachedGlyph(glyph, cache):
+    """
+    Return (segments, newEntry). newEntry is the
+    (geometryHash, segments) to add to the cache,
+    or None if the glyph was already in it.
+    """
+    if cache is None:
+        return analyzeGlyph(glyph), None
+
+    geometryHash = getGeometryHash(glyph)
+    segments = cache.get(geometryHash)
+    if segments is not None:
+        return segments, None
+
+    segments = analyzeGlyph(glyph)
+    return segments, (geometryHash, segments)
+
+def _openWorkerFont(fontPath, cachePath=None):
+    """
+    Pool initializer: open the font (and cache) once per worker process
+    """
+    global _workerFont, _workerCache
+    _workerFont = OpenFont(fontPath, showInterface=False)
+    if cachePath is not None:
+        _workerCache = ResultCache(cachePath)
+
+def _auditWorkerGlyph(args):
+    """
+    Pool task: check one glyph of the worker's font
+    and return (results, newEntry)
+    """
+    glyphName, tolerance = args
+    segments, newEntry = _analyzeCachedGlyph(_workerFont[glyphName], _workerCache)
+    return makeResults(glyphName, segments, tolerance), newEntry
+
+def readFontTolerance(fontPath):
+    """
+    Return the tolerance stored in the UFO's lib,
+    or the extension's setting if the font doesn't have one.
+    Reads lib.plist directly, so the font doesn't have to be opened.
+    """
+    libPath = os.path.join(fontPath, "lib.plist")
+    if os.path.exists(libPath):
+        with open(libPath, "rb") as libFile:
+            fontTolerance = plistlib.load(libFile).get(LIB_KEY)
+        if fontTolerance is not None:
+            return float(fontTolerance)
+    return toleranceSettings.getTolerance()
+
+def auditFont(fontPath, tolerance, workers=None, cache=None):
+    """
+    Check every glyph in the UFO at fontPath and return
+    a list of segment results (see auditGlyph()), in glyph order.
+
+    workers is the number of processes to use,
+    and defaults to the number of cores on the machine.
+    cache is an optional ResultCache.
+    """
+    font = OpenFont(fontPath, showInterface=False)
+    glyphNames = [name for name in font.glyphOrder if name in font]
+    glyphNames += sorted(name for name in font.keys() if name not in glyphNames)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results = []
+    newEntries = []
+    if workers == 1:
+        for glyphName in glyphNames:
+            segments, newEntry = _analyzeCachedGlyph(font[glyphName], cache)
+            results.extend(makeResults(glyphName, segments, tolerance))
+            if newEntry is not None:
+                newEntries.append(newEntry)
+    else:
+        # Not much to do per glyph, so hand them out in batches
+        chunkSize = max(1, len(glyphNames) // (workers * 8))
+        tasks = [(glyphName, tolerance) for glyphName in glyphNames]
+        cachePath = cache.cachePath if cache is not None else None
+        with multiprocessing.Pool(workers, initializer=_openWorkerFont,
+                                  initargs=(fontPath, cachePath)) as pool:
+            for glyphResults, newEntry in pool.imap(_auditWorkerGlyph, tasks, chunksize=chunkSize):
+                results.extend(glyphResults)
+                if newEntry is not None:
+                    newEntries.append(newEntry)
+
+    if cache is not None and newEntries:
+        cache.putMany(newEntries)
+    return results
+
+def _checkGlyphFiles(glyphsDir, fileNames):
+    """
+    Read, pack and check a chunk of .glif files.
+    Return (offsets, indices, deviations), see glifReader.packGlyphs()
+    """
+    offsets, indices, coords, sources = packGlyphs(glyphsDir, fileNames)
+    return offsets, indices, bf.getAngleDeviations(coords)[sources]
+
+def _checkWorkerChunk(args):
+    """
+    Pool task: check a chunk of .glif files and write the results
+    into the shared output arrays, from start on.
+    Only the chunk's glyph offsets go back through the pipe.
+
+    The arrays are attached for each chunk and closed right after.
+    Pool workers are terminated without running any exit handlers,
+    so a view kept open between chunks would never be closed.
+    """
+    glyphsDir, fileNames, start, capacity, indicesSpec, deviationsSpec = args
+    offsets, indices, deviations = _checkGlyphFiles(glyphsDir, fileNames)
+    if len(deviations) > capacity:
+        raise ValueError("More segments than expected in %s" % glyphsDir)
+    for spec, values in ((indicesSpec, indices), (deviationsSpec, deviations)):
+        shared = SharedArray.attach(spec)
+        try:
+            shared.array[start:start + len(values)] = values
+        finally:
+            shared.close()
+    return start, offsets
+
+def auditUFO(fontPath, tolerance, workers=None, components=False):
+    """
+    Same as auditFont(), but reads the .glif files directly
+    (see glifReader) instead of opening the font with fontParts,
+    and checks segments in batches.
+
+    With several workers, each one reads, packs and checks its own
+    chunk of glyphs, so outlines never leave the worker, and writes
+    results into output arrays in shared memory. Each chunk gets
+    a slice of the output big enough for the most segments its files
+    could hold, so workers don't have to wait on each other.
+
+    With components, composite glyphs are checked as if they were
+    decomposed, in a single process (see auditUFOComponents()).
+    """
+    glyphFiles = getGlyphFiles(fontPath)
+    glyphsDir = os.path.join(fontPath, "glyphs")
+    fileNames = [fileName for glyphName, fileName in glyphFiles]
+
+    if components:
+        return auditUFOComponents(glyphsDir, glyphFiles, tolerance)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        offsets, indices, deviations = _checkGlyphFiles(glyphsDir, fileNames)
+        chunks = [(offsets, indices.tolist(), deviations.tolist())]
+    else:
+        chunkSize = max(1, -(-len(fileNames) // (workers * 4)))
+        chunkSlices = []
+        totalCapacity = 0
+        for i in range(0, len(fileNames), chunkSize):
+            chunkFiles = fileNames[i:i + chunkSize]
+            capacity = sum(os.path.getsize(os.path.join(glyphsDir, fileName)) // MIN_SEGMENT_BYTES
+                           for fileName in chunkFiles)
+            chunkSlices.append((chunkFiles, totalCapacity, capacity))
+            totalCapacity += capacity
+
+        indicesOut = SharedArray((totalCapacity, 2), np.int32)
+        deviationsOut = SharedArray((totalCapacity,), np.float64)
+        tasks = [(glyphsDir, chunkFiles, start, capacity, indicesOut.spec, deviationsOut.spec)
+                 for chunkFiles, start, capacity in chunkSlices]
+        try:
+            chunks = []
+            with multiprocessing.Pool(workers) as pool:
+                for start, offsets in pool.imap(_checkWorkerChunk, tasks):
+                    end = start + offsets[-1]
+                    chunks.append((offsets,
+                                   indicesOut.array[start:end].tolist(),
+                                   deviationsOut.array[start:end].tolist()))
+        finally:
+            for shared in (indicesOut, deviationsOut):
+                shared.close()
+                shared.unlink()
+
+    results = []
+    glyphNames = iter(glyphName for glyphName, fileName in glyphFiles)
+    for offsets, indices, deviations in chunks:
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            segments = [(contourIndex, segmentIndex, deviation)
+                        for (contourIndex, segmentIndex), deviation in zip(indices[start:end], deviations[start:end])]
+            results.extend(makeResults(next(glyphNames), segments, tolerance))
+    return results
+
+def auditUFOComponents(glyphsDir, glyphFiles, tolerance):
+    """
+    Check every glyph with its components decomposed.
+    Each glyph's own segments are checked once, in one batch,
+    and components reuse the results of their base glyph
+    (see componentFuncs).
+    """
+    fileNames = [fileName for glyphName, fileName in glyphFiles]
+    offsets, indices, coords, sources, outlines = packGlyphOutlines(glyphsDir, fileNames)
+    vectors = bf.getSegmentVectors(coords)[sources]
+    deviations = bf.getAngleDeviations(coords)[sources]
+
+    resolver = ComponentResolver()
+    for i, (glyphName, fileName) in enumerate(glyphFiles):
+        start, end = offsets[i], offsets[i + 1]
+        contourCount, glyphComponents = outlines[i]
+        resolver.setGlyph(glyphName, contourCount, indices[start:end], vectors[start:end],
+                          deviations[start:end], glyphComponents)
+
+    results = []
+    for glyphName, fileName in glyphFiles:
+        contourCount, glyphIndices, glyphVectors, glyphDeviations = resolver.resolve(glyphName)
+        segments = [(contourIndex, segmentIndex, deviation)
+                    for (contourIndex, segmentIndex), deviation in zip(glyphIndices.tolist(), glyphDeviations.tolist())]
+        results.extend(makeResults(glyphName, segments, tolerance))
+    return results
+
+def writeReport(results, outFile, reportFormat="json", fontPath=None, tolerance=None,
+                fieldNames=REPORT_FIELDS):
+    """
+    Write results to an open file object,
+    either as JSON or as CSV (one row per segment).
+    tolerance is the one the results were checked with, or
+    {fontPath: tolerance} when fonts were checked with their own.
+    """
+    if reportFormat == "csv":
+        writer = csv.DictWriter(outFile, fieldnames=fieldNames)
+        writer.writeheader()
+        writer.writerows(results)
+    else:
+        report = {"font": fontPath,
+                  "tolerance": tolerance,
+                  "segments": results}
+        json.dump(report, outFile, indent=2)
+        outFile.write("\n")
@@ -0,0 +1,80 @@
+"""
+Coalesce updates that arrive faster than the screen refreshes.
+
+Mouse drag events can come in faster than a glyph.changed()
+(and every observer it sets off) can finish. Instead of applying
+every event, keep only the latest one and apply it at most
+once per display frame.
+"""
+
+import time
+
+# 60 fps. Faster displays still only need one glyph change per frame
+# they can show, and this keeps the change cascade from piling up.
+FRAME_INTERVAL = 1 / 60
+
+def scheduleWithNSTimer(delay, callback):
+    """
+    Call callback (with no arguments) after delay seconds,
+    on the main run loop
+    """
+    from Foundation import NSTimer
+    NSTimer.scheduledTimerWithTimeInterval_repeats_block_(delay, False, lambda timer: callback())
+
+class FrameCoalescer:
+    """
+    Hold on to the latest submitted state and pass it to
+    applyCallback at most once every frameInterval seconds.
+    flush() applies whatever is pending right away (eg. on mouseUp).
+    """
+    def __init__(self, applyCallback, frameInterval=FRAME_INTERVAL,
+                 scheduleCallback=scheduleWithNSTimer, clock=time.perf_counter):
+        self.applyCallback = applyCallback
+        self.frameInterval = frameInterval
+        self.scheduleCallback = scheduleCallback
+        self.clock = clock
+
+        self._pending = None
+        self._hasPending = False
+        self._timerIsScheduled = False
+        self._lastApplied = None
+
+    def submit(self, state):
+        """
+        Apply state now if a frame has passed since the last
+        update, otherwise apply it (or whatever comes after it)
+        when the frame is up
+        """
+        self._pending = state
+        self._hasPending = True
+
+        now = self.clock()
+        if self._lastApplied is None or now - self._lastApplied >= self.frameInterval:
+            self.flush()
+        elif not self._timerIsScheduled:
+            self._timerIsScheduled = True
+            self.scheduleCallback(self._lastApplied + self.frameInterval - now, self._timerFired)
+
+    def flush(self):
+        """
+        Apply pending state, if there is any
+        """
+        if not self._hasPending:
+            return
+        state = self._pending
+        self._pending = None
+        self._hasPending = False
+        self._lastApplied = self.clock()
+        self.applyCallback(state)
+
+    def reset(self):
+        """
+        Drop pending state and start over (eg. on mouseDown)
+        """
+        self._pending = None
+        self._hasPending = False
+        self._lastApplied = None
+
+    def _timerFired(self):
+        self._timerIsScheduled = False
+        self.flush()
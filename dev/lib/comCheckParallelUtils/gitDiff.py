@@ -0,0 +1,125 @@
+"""
+Check only the glyphs of a UFO that changed between two git revisions.
+
+Each changed .glif is read at both revisions (with git show, or from
+disk for the working tree) and checked with glifReader, so the font
+itself is never opened. A non-parallel segment is new if no segment
+with the same coordinates was already non-parallel before the change,
+so problems that were there all along aren't reported as regressions.
+"""
+
+import os
+import subprocess
+from collections import Counter
+
+from comCheckParallelUtils.glifReader import readGlif, analyzeContours
+from comCheckParallelUtils.fontAudit import REPORT_FIELDS
+
+DIFF_REPORT_FIELDS = REPORT_FIELDS + ["new"]
+
+# Pass as until to compare with the staged changes (git's index)
+# instead of the working tree
+INDEX = ""
+
+def runGit(repoDir, *args):
+    """
+    Run a git command in repoDir and return its output (bytes).
+    Raises subprocess.CalledProcessError if git fails.
+    """
+    return subprocess.run(["git", "-C", repoDir] + list(args),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          check=True).stdout
+
+def findChangedGlifs(ufoPath, since, until=None):
+    """
+    Return (repoRoot, paths) where paths are the .glif files
+    of the UFO's default layer that changed between since and until,
+    relative to the repository root.
+    If until is None, compare since against the working tree,
+    if it's INDEX, against the staged changes.
+    """
+    ufoPath = os.path.realpath(ufoPath)
+    repoRoot = runGit(ufoPath, "rev-parse", "--show-toplevel").decode("utf-8").strip()
+    glyphsDir = os.path.relpath(os.path.join(ufoPath, "glyphs"), os.path.realpath(repoRoot))
+
+    if until is None:
+        revisions = [since]
+    elif until == INDEX:
+        revisions = ["--cached", since]
+    else:
+        revisions = [since, until]
+    output = runGit(repoRoot, "diff", "--name-only", "--no-renames", "-z",
+                    *revisions, "--", glyphsDir.replace(os.sep, "/"))
+    paths = [path for path in output.decode("utf-8").split("\0") if path.endswith(".glif")]
+    return repoRoot, paths
+
+def readGlifAt(repoRoot, path, revision=None):
+    """
+    Return the bytes of a .glif at a revision (in the working tree
+    if revision is None, staged if it's INDEX),
+    or None if it doesn't exist there
+    """
+    if revision is None:
+        fullPath = os.path.join(repoRoot, path)
+        if not os.path.exists(fullPath):
+            return None
+        with open(fullPath, "rb") as glifFile:
+            return glifFile.read()
+
+    try:
+        return runGit(repoRoot, "show", "%s:%s" % (revision, path))
+    except subprocess.CalledProcessError:
+        return None
+
+def _getNonParallelKeys(contours, tolerance):
+    """
+    Count non-parallel segments by their (rounded) coordinates
+    """
+    indices, coords, deviations = analyzeContours(contours)
+    keys = Counter()
+    for segmentCoords, deviation in zip(coords.round(3).tolist(), deviations.tolist()):
+        if deviation > tolerance:
+            keys[repr(segmentCoords)] += 1
+    return keys
+
+def auditChanges(ufoPath, since, until=None, tolerance=0):
+    """
+    Check the glyphs that changed between since and until
+    (or the working tree, see findChangedGlifs()) and return (results, newCount).
+
+    results has one dict per segment of every changed glyph,
+    with the keys in DIFF_REPORT_FIELDS, and newCount is the number
+    of new non-parallel segments. Deleted glyphs are left out.
+    """
+    repoRoot, paths = findChangedGlifs(ufoPath, since, until)
+    results = []
+    newCount = 0
+    for path in paths:
+        newData = readGlifAt(repoRoot, path, until)
+        if newData is None:
+            continue
+        glyphName, contours = readGlif(newData)
+
+        oldData = readGlifAt(repoRoot, path, since)
+        preExisting = Counter()
+        if oldData is not None:
+            preExisting = _getNonParallelKeys(readGlif(oldData)[1], tolerance)
+
+        indices, coords, deviations = analyzeContours(contours)
+        for (contourIndex, segmentIndex), segmentCoords, deviation in zip(indices, coords.round(3).tolist(), deviations.tolist()):
+            isParallel = deviation <= tolerance
+            isNew = False
+            if not isParallel:
+                key = repr(segmentCoords)
+                if preExisting[key]:
+                    preExisting[key] -= 1
+                else:
+                    isNew = True
+                    newCount += 1
+            results.append({"glyph": glyphName,
+                            "contour": contourIndex,
+                            "segment": segmentIndex,
+                            "deviation": round(deviation, 4),
+                            "parallel": isParallel,
+                            "new": isNew})
+    return results, newCount
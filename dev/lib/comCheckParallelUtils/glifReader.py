@@ -0,0 +1,280 @@
+"""
+Read outlines straight from .glif data, without fontParts,
+for when only a few glyphs (or a few revisions of them) are needed.
+
+Contours are lists of (type, x, y) tuples, in the order
+the points are in the file. Offcurves have type "offcurve",
+like fontParts points.
+
+For whole fonts, readGlifContours() memory-maps each file and only
+picks <contour> and <point> elements out of the outline (anchors,
+guidelines, lib and the rest are never parsed), and packGlyphs()
+writes the curve segments of many glyphs into one packed array.
+readGlifOutline() and packGlyphOutlines() also pick out <component>s.
+"""
+
+import os
+import re
+import mmap
+import plistlib
+import xml.etree.ElementTree as ET
+import numpy as np
+
+import comCheckParallelUtils.batchFuncs as bf
+
+CONTOUR_RE = re.compile(rb"<contour\b[^>]*?(?:/>|>(.*?)</contour>)", re.S)
+POINT_RE = re.compile(rb"<point\b([^>]*?)/?>")
+ATTRIBUTE_RE = re.compile(rb"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+COMMENT_RE = re.compile(rb"<!--.*?-->", re.S)
+COMPONENT_RE = re.compile(rb"<component\b([^>]*?)/?>")
+
+# Component attributes and their defaults, in fontTools transformation order
+COMPONENT_TRANSFORM = [(b"xScale", 1.0), (b"xyScale", 0.0), (b"yxScale", 0.0),
+                       (b"yScale", 1.0), (b"xOffset", 0.0), (b"yOffset", 0.0)]
+
+def readGlif(data, withComponents=False):
+    """
+    Return (glyphName, contours) from the bytes of a .glif file.
+    Components are left out, unless withComponents:
+    then return (glyphName, contours, components)
+    (see readGlifOutline()).
+    """
+    root = ET.fromstring(data)
+    contours = []
+    components = []
+    outline = root.find("outline")
+    if outline is not None:
+        for contour in outline.findall("contour"):
+            contours.append([(point.get("type", "offcurve"), float(point.get("x")), float(point.get("y")))
+                             for point in contour.findall("point")])
+        for component in outline.findall("component"):
+            if component.get("base") is None:
+                continue
+            transformation = tuple(float(component.get(name.decode("ascii"), default))
+                                   for name, default in COMPONENT_TRANSFORM)
+            components.append((component.get("base"), transformation))
+    if withComponents:
+        return root.get("name"), contours, components
+    return root.get("name"), contours
+
+def splitSegments(points):
+    """
+    Split a contour's points into segments, the same way
+    fontParts does (contour.segments), so segment indices match
+    the ones reported for a glyph opened with fontParts
+    """
+    if not points:
+        return []
+    segments = [[]]
+    lastWasOffCurve = False
+    firstIsMove = points[0][0] == "move"
+    for point in points:
+        segments[-1].append(point)
+        if point[0] != "offcurve":
+            segments.append([])
+        lastWasOffCurve = point[0] == "offcurve"
+    if not segments[-1]:
+        del segments[-1]
+    if lastWasOffCurve and firstIsMove:
+        # Trailing offcurves of an open contour don't make a segment
+        del segments[-1]
+    if lastWasOffCurve and not firstIsMove and len(segments) > 1:
+        segment = segments.pop(-1)
+        segment.extend(segments[0])
+        del segments[0]
+        segments.append(segment)
+    if not lastWasOffCurve and not firstIsMove:
+        segments.append(segments.pop(0))
+    return segments
+
+def findCurveSegments(points):
+    """
+    Point tuple version of helperFuncs.findCurveSegments():
+    [(segmentIndex, prevPt, (bcp1, bcp2, pt)), ...]
+    """
+    curveSegments = []
+    segments = splitSegments(points)
+    for i, segment in enumerate(segments):
+        if segment[-1][0] not in ["curve", "qcurve"] or len(segment) != 3:
+            continue
+        prevPt = segments[i - 1][-1]
+        curveSegments.append((i, prevPt, segment))
+    return curveSegments
+
+def analyzeContours(contours):
+    """
+    Return (indices, coords, deviations) for all curve segments:
+    [(contourIndex, segmentIndex), ...], the (N, 4, 2) packed
+    segments (see batchFuncs) and their angle deviations
+    """
+    indices = []
+    packed = []
+    for contourIndex, points in enumerate(contours):
+        for segmentIndex, prevPt, segment in findCurveSegments(points):
+            indices.append((contourIndex, segmentIndex))
+            packed.append([(x, y) for pointType, x, y in (prevPt,) + tuple(segment)])
+
+    coords = np.array(packed, dtype=np.float64).reshape(-1, 4, 2)
+    return indices, coords, bf.getAngleDeviations(coords)
+
+def readGlifContours(path):
+    """
+    Return the contours of the .glif at path, like readGlif(),
+    but only reading the file's <outline>
+    """
+    return _readOutline(path, False)[0]
+
+def readGlifOutline(path):
+    """
+    Return (contours, components) of the .glif at path.
+    components is [(baseGlyph, (xx, xy, yx, yy, dx, dy)), ...]
+    """
+    return _readOutline(path, True)
+
+def _readOutline(path, withComponents):
+    with open(path, "rb") as glifFile:
+        try:
+            data = mmap.mmap(glifFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return [], []
+        with data:
+            start = data.find(b"<outline")
+            if start == -1:
+                return [], []
+            end = data.find(b"</outline>", start)
+            outline = data[start:end] if end != -1 else b""
+
+    if b"<!--" in outline:
+        outline = COMMENT_RE.sub(b"", outline)
+
+    contours = []
+    for contourMatch in CONTOUR_RE.finditer(outline):
+        points = []
+        for attributes in POINT_RE.findall(contourMatch.group(1) or b""):
+            pointType = b"offcurve"
+            x = y = None
+            for name, doubleQuoted, singleQuoted in ATTRIBUTE_RE.findall(attributes):
+                value = doubleQuoted or singleQuoted
+                if name == b"x":
+                    x = float(value)
+                elif name == b"y":
+                    y = float(value)
+                elif name == b"type":
+                    pointType = value
+            points.append((pointType.decode("ascii"), x, y))
+        contours.append(points)
+
+    components = []
+    if withComponents:
+        for attributes in COMPONENT_RE.findall(outline):
+            values = {name: doubleQuoted or singleQuoted
+                      for name, doubleQuoted, singleQuoted in ATTRIBUTE_RE.findall(attributes)}
+            if b"base" not in values:
+                continue
+            transformation = tuple(float(values.get(name, default)) for name, default in COMPONENT_TRANSFORM)
+            components.append((values[b"base"].decode("utf-8"), transformation))
+    return contours, components
+
+def getLayerDir(ufoPath, layerName=None):
+    """
+    Return the glyphs folder of a layer (the default layer if layerName is None)
+    """
+    if layerName is None:
+        return os.path.join(ufoPath, "glyphs")
+    with open(os.path.join(ufoPath, "layercontents.plist"), "rb") as layersFile:
+        for name, dirName in plistlib.load(layersFile):
+            if name == layerName:
+                return os.path.join(ufoPath, dirName)
+    raise KeyError("No layer %r in %s" % (layerName, ufoPath))
+
+def getGlyphFiles(ufoPath, layerName=None):
+    """
+    Return [(glyphName, fileName), ...] for a layer of the UFO
+    (the default layer if layerName is None),
+    in the font's glyph order (then the rest, sorted by name),
+    the same order fontAudit.auditFont() goes through glyphs in
+    """
+    with open(os.path.join(getLayerDir(ufoPath, layerName), "contents.plist"), "rb") as contentsFile:
+        contents = plistlib.load(contentsFile)
+
+    glyphOrder = []
+    libPath = os.path.join(ufoPath, "lib.plist")
+    if os.path.exists(libPath):
+        with open(libPath, "rb") as libFile:
+            glyphOrder = plistlib.load(libFile).get("public.glyphOrder", [])
+
+    glyphNames = [name for name in glyphOrder if name in contents]
+    ordered = set(glyphNames)
+    glyphNames += sorted(name for name in contents if name not in ordered)
+    return [(name, contents[name]) for name in glyphNames]
+
+def getContourKey(points):
+    """
+    Return a hashable key of a contour's shape: its point types
+    and coordinates relative to its first point, so a contour
+    has the same key wherever it is moved to
+    """
+    if not points:
+        return ()
+    x0 = points[0][1]
+    y0 = points[0][2]
+    return tuple([(pointType, x - x0, y - y0) for pointType, x, y in points])
+
+def packGlyphs(glyphsDir, fileNames):
+    """
+    Read the .glif files and pack all their curve segments
+    into one array. Return (offsets, indices, coords, sources):
+
+    offsets: (G + 1,) glyph i's segments are offsets[i]:offsets[i + 1]
+    indices: (N, 2) contour and segment index of each segment
+    coords: (U, 4, 2) packed segments (see batchFuncs) of unique contours
+    sources: (N,) segment i is coords[sources[i]]
+
+    Contours that are the same shape as one already read (only moved,
+    like stems and dots copied from glyph to glyph) aren't packed
+    again, so each unique contour is only checked once and its
+    results fan out through sources: deviations[sources].
+    """
+    return _packGlyphs(glyphsDir, fileNames, False)[:4]
+
+def packGlyphOutlines(glyphsDir, fileNames):
+    """
+    Same as packGlyphs(), but also return what the glyphs' outlines
+    are made of: (offsets, indices, coords, sources, outlines), where
+    outlines is [(contourCount, components), ...] (see readGlifOutline())
+    """
+    return _packGlyphs(glyphsDir, fileNames, True)
+
+def _packGlyphs(glyphsDir, fileNames, withComponents):
+    offsets = [0]
+    indices = []
+    sources = []
+    values = []
+    outlines = []
+    # {contour key: (first packed segment, segment indices)}
+    packedContours = {}
+    for fileName in fileNames:
+        contours, components = _readOutline(os.path.join(glyphsDir, fileName), withComponents)
+        for contourIndex, points in enumerate(contours):
+            contourKey = getContourKey(points)
+            packed = packedContours.get(contourKey)
+            if packed is None:
+                first = len(values) // 8
+                segmentIndices = []
+                for segmentIndex, prevPt, (bcp1, bcp2, pt) in findCurveSegments(points):
+                    segmentIndices.append(segmentIndex)
+                    values.extend((prevPt[1], prevPt[2], bcp1[1], bcp1[2], bcp2[1], bcp2[2], pt[1], pt[2]))
+                packed = packedContours[contourKey] = (first, segmentIndices)
+            first, segmentIndices = packed
+            for i, segmentIndex in enumerate(segmentIndices, first):
+                indices.append((contourIndex, segmentIndex))
+                sources.append(i)
+        offsets.append(len(indices))
+        outlines.append((len(contours), components))
+
+    return (np.array(offsets, dtype=np.int64),
+            np.array(indices, dtype=np.int32).reshape(-1, 2),
+            np.array(values, dtype=np.float64).reshape(-1, 4, 2),
+            np.array(sources, dtype=np.intp),
+            outlines)
@@ -0,0 +1,184 @@
+"""
+Keep the parallel check of a whole UFO up to date
+while its .glif files are edited (in any app).
+
+The glyphs folder is polled for modification times, so nothing
+outside the standard library is needed. A changed file is only
+checked again once it has stopped changing for a moment, so
+an app saving the same glyph several times in a row (or writing
+it in pieces) only costs one check.
+
+With components, composite glyphs are checked decomposed, and
+saving a glyph also checks the composites that use it again
+(reusing the results of every other base glyph, see componentFuncs).
+"""
+
+import os
+import time
+import xml.etree.ElementTree as ET
+
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.glifReader import readGlif, analyzeContours
+from comCheckParallelUtils.fontAudit import makeResults
+from comCheckParallelUtils.componentFuncs import ComponentResolver
+
+class GlyphWatcher:
+    """
+    results is {glyphName: [segment results, ...]} (see fontAudit.makeResults())
+    for every glyph in the UFO's default layer.
+
+    onChange, if given, is called with the watcher and the
+    list of glyph names that were checked again (or removed).
+    """
+    def __init__(self, ufoPath, tolerance, debounce=0.3, onChange=None, clock=time.monotonic,
+                 components=False):
+        self.glyphsDir = os.path.join(ufoPath, "glyphs")
+        self.tolerance = tolerance
+        self.debounce = debounce
+        self.onChange = onChange
+        self.clock = clock
+        self._resolver = ComponentResolver() if components else None
+
+        self.results = {}
+        # {fileName: (mtime, size)} of the version in results
+        self._fileStats = {}
+        # {fileName: glyphName}
+        self._glyphNames = {}
+        # {fileName: ((mtime, size), time it was first seen like that)}
+        self._pending = {}
+
+    def scan(self):
+        """
+        Check every glyph now, without waiting
+        """
+        checkedGlyphs = []
+        for fileName, fileStat in self._listFiles().items():
+            glyphName = self._checkFile(fileName, fileStat)
+            if glyphName is not None:
+                checkedGlyphs.append(glyphName)
+        self._pending.clear()
+        self._resolveGlyphs(checkedGlyphs)
+
+    def poll(self):
+        """
+        Look for changed, new and deleted .glif files,
+        check the ones that have settled and
+        return the names of the glyphs that changed
+        """
+        now = self.clock()
+        files = self._listFiles()
+        changedGlyphs = []
+
+        for fileName in list(self._fileStats):
+            if fileName not in files:
+                glyphName = self._glyphNames.pop(fileName, None)
+                del self._fileStats[fileName]
+                self._pending.pop(fileName, None)
+                if glyphName is not None:
+                    self._removeGlyph(glyphName)
+                    changedGlyphs.append(glyphName)
+
+        for fileName, fileStat in files.items():
+            if self._fileStats.get(fileName) == fileStat:
+                self._pending.pop(fileName, None)
+                continue
+            pendingStat, firstSeen = self._pending.get(fileName, (None, None))
+            if pendingStat != fileStat:
+                # Still changing, start waiting again
+                self._pending[fileName] = (fileStat, now)
+                continue
+            if now - firstSeen < self.debounce:
+                continue
+            del self._pending[fileName]
+            glyphName = self._checkFile(fileName, fileStat)
+            if glyphName is not None:
+                changedGlyphs.append(glyphName)
+
+        changedGlyphs = self._resolveGlyphs(changedGlyphs)
+        if changedGlyphs and self.onChange is not None:
+            self.onChange(self, changedGlyphs)
+        return changedGlyphs
+
+    def run(self, interval=0.5):
+        """
+        Poll until interrupted (Ctrl-C)
+        """
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    def getAllResults(self):
+        """
+        Return every glyph's results as one list, sorted by glyph name
+        """
+        allResults = []
+        for glyphName in sorted(self.results):
+            allResults.extend(self.results[glyphName])
+        return allResults
+
+    def _listFiles(self):
+        files = {}
+        for entry in os.scandir(self.glyphsDir):
+            if entry.name.endswith(".glif"):
+                fileStat = entry.stat()
+                files[entry.name] = (fileStat.st_mtime_ns, fileStat.st_size)
+        return files
+
+    def _checkFile(self, fileName, fileStat):
+        """
+        Check one .glif and return its glyph name,
+        or None if it can't be read (yet)
+        """
+        try:
+            with open(os.path.join(self.glyphsDir, fileName), "rb") as glifFile:
+                glyphName, contours, components = readGlif(glifFile.read(), withComponents=True)
+        except (OSError, ET.ParseError):
+            # Half written or gone, try again on the next poll
+            return None
+
+        oldName = self._glyphNames.get(fileName)
+        if oldName is not None and oldName != glyphName:
+            self._removeGlyph(oldName)
+
+        indices, coords, deviations = analyzeContours(contours)
+        if self._resolver is None:
+            segments = [(contourIndex, segmentIndex, deviation)
+                        for (contourIndex, segmentIndex), deviation in zip(indices, deviations.tolist())]
+            self.results[glyphName] = makeResults(glyphName, segments, self.tolerance)
+        else:
+            # Results are made in _resolveGlyphs(), once every changed glyph is in
+            self._resolver.setGlyph(glyphName, len(contours), indices, bf.getSegmentVectors(coords),
+                                    deviations, components)
+        self._glyphNames[fileName] = glyphName
+        self._fileStats[fileName] = fileStat
+        return glyphName
+
+    def _removeGlyph(self, glyphName):
+        self.results.pop(glyphName, None)
+        if self._resolver is not None:
+            self._resolver.removeGlyph(glyphName)
+
+    def _resolveGlyphs(self, glyphNames):
+        """
+        With components, make the results of the changed glyphs
+        and of the composites using them. Return the names of
+        every glyph that was checked again (or removed).
+        """
+        if self._resolver is None or not glyphNames:
+            return glyphNames
+        changedGlyphs = list(glyphNames)
+        for glyphName in glyphNames:
+            for user in self._resolver.getUsers(glyphName):
+                if user not in changedGlyphs:
+                    changedGlyphs.append(user)
+        for glyphName in changedGlyphs:
+            if glyphName not in self._resolver:
+                continue
+            contourCount, indices, vectors, deviations = self._resolver.resolve(glyphName)
+            segments = [(contourIndex, segmentIndex, deviation)
+                        for (contourIndex, segmentIndex), deviation in zip(indices.tolist(), deviations.tolist())]
+            self.results[glyphName] = makeResults(glyphName, segments, self.tolerance)
+        return changedGlyphs
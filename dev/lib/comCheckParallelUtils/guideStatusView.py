@@ -1,27 +1,43 @@
+import time
 from vanilla import Group, TextBox
 
 class GuideStatusView:
     """
     A view object with text that shows
     whether parallel guides are on or not
+
+    In diagnostics mode, it also shows how long the guides
+    took to analyze and draw (see DrawingDelegate.frameStats)
     """
-    def __init__(self):
+    def __init__(self, updateInterval=0.25):
         self.view = Group((0, 0, -0, -0))
-        self.view.statusText = TextBox((-120, -30, 100, 22),
+        self.view.statusText = TextBox((-160, -30, 140, 22),
                                        text="⚪️ Parallel Guides",
                                        alignment="right",
                                        sizeStyle="mini")
+        self.view.diagnosticsText = TextBox((-320, -44, 300, 14),
+                                            text="",
+                                            alignment="right",
+                                            sizeStyle="mini")
+
+        # Don't update diagnostics text more often than this (seconds)
+        self.updateInterval = updateInterval
+        self._lastUpdate = 0
     def addViewToWindow(self, glyphWindow):
         """
         Add this view to the glyph window passed in
         """
         glyphWindow.addGlyphEditorSubview(self.view)
 
-    def turnStatusTextOn(self):
+    def turnStatusTextOn(self, allSegments=False):
         """
-        Turn view on
+        Turn view on. allSegments is True when guides
+        are shown for the whole glyph.
         """
-        self.view.statusText.set("🔵 Parallel Guides")
+        if allSegments:
+            self.view.statusText.set("🔵 Parallel Guides (All)")
+        else:
+            self.view.statusText.set("🔵 Parallel Guides")
 
     def turnStatusTextOff(self):
         """
@@ -29,6 +45,31 @@ class GuideStatusView:
         """
         self.view.statusText.set("⚪️ Parallel Guides")
 
+    def setDiagnostics(self, value):
+        """
+        Show or hide diagnostics text
+        """
+        self.view.diagnosticsText.show(value)
+        self.view.diagnosticsText.set("")
+        self._lastUpdate = 0
+
+    def updateDiagnostics(self, frameStats, force=False):
+        """
+        Show last and rolling p95 frame time, number of segments
+        and whether the frame came from the cache.
+        Throttled to once per updateInterval, unless force is True.
+        """
+        now = time.perf_counter()
+        if not force and now - self._lastUpdate < self.updateInterval:
+            return
+        self._lastUpdate = now
+
+        text = "%d segs · %.2f ms (p95 %.2f ms) · %s" % (frameStats.segmentCount,
+                                                        frameStats.lastDuration * 1000,
+                                                        frameStats.getP95() * 1000,
+                                                        "cached" if frameStats.cacheHit else "analyzed")
+        self.view.diagnosticsText.set(text)
+
 
 if __name__ == "__main__":
     #Test the view
@@ -2,7 +2,11 @@
 Helper functions for CheckParallel and ToleranceWindow
 They're here because I don't like having to scroll around too much
 """
+import os
 import math
+import tempfile
+
+from comCheckParallelUtils.profiler import profiled
 
 def readSetting(settingDir):
     """
@@ -13,10 +17,9 @@ def readSetting(settingDir):
     try:
         with open(settingDir, "r") as settingFile:
             tolerance = float(settingFile.read())
-    except FileNotFoundError:
-        with open(settingDir, "w+") as settingFile:
-            tolerance = 2.5
-            settingFile.write(str(tolerance))
+    except (FileNotFoundError, ValueError):
+        tolerance = 2.5
+        writeSetting(settingDir, tolerance)
     return tolerance
 
 def getSlopeAndIntercept(pt0, pt1):
@@ -56,6 +59,22 @@ def getDistance(pt0, pt1):
 
     return math.sqrt((pt1x - pt0x)**2 + (pt1y - pt0y)**2)
 
+def getLineTolerance(scale):
+    """
+    Return how far (in units) a click can be from a line
+    and still be considered on it.
+
+    tolerance rect gets larger as user
+    zooms out, smaller as user zooms in,
+    to certain sizes
+    """
+    if scale >= 1.5:
+        return 1.5
+    elif scale <= 0.3:
+        return 0.3
+    return scale
+
+@profiled("helperFuncs.isPointInLine")
 def isPointInLine(point, line, scale):
     """
     Check if point is w/in line, with some tolerance.
@@ -71,13 +90,7 @@ def isPointInLine(point, line, scale):
     if point is None or line is None:
         return False
 
-    # tolerance rect gets larger as user
-    # zooms out, smaller as user zooms in,
-    # to certain sizes
-    if scale >= 1.5:
-        scale = 1.5
-    elif scale <= 0.3:
-        scale = 0.3
+    scale = getLineTolerance(scale)
 
     pt0, pt1 = line
 
@@ -87,11 +100,11 @@ def isPointInLine(point, line, scale):
 
     return abs(distance1 + distance2 - lineLength) < scale
 
-def areTheyParallel(line1, line2, tolerance=0):
+@profiled("helperFuncs.getAngleDeviation", lambda args, result: 1)
+def getAngleDeviation(line1, line2):
     """
-    Checks if 2 lines are parallel by comparing their slopes
-    line1 and line2 should be a tuple of tuples each: ((x0, y0), (x1, y1))
-    tolerance defaults to 0
+    Return the difference (in degrees) between the angles of 2 lines.
+    line1 and line2 should be a tuple of points each: (pt0, pt1)
     """
     p0, p1 = line1
     p2, p3 = line2
@@ -100,10 +113,38 @@ def areTheyParallel(line1, line2, tolerance=0):
     angle1 = abs(math.atan2((p1.y - p0.y), (p1.x - p0.x)) * 180 / math.pi)
     angle2 = abs(math.atan2((p3.y - p2.y), (p3.x - p2.x)) * 180 / math.pi)
 
+    return abs(angle1 - angle2)
+
+@profiled("helperFuncs.areTheyParallel", lambda args, result: 1)
+def areTheyParallel(line1, line2, tolerance=0):
+    """
+    Checks if 2 lines are parallel by comparing their slopes
+    line1 and line2 should be a tuple of tuples each: ((x0, y0), (x1, y1))
+    tolerance defaults to 0
+    """
     # instead of checking for absolute equality,
     # allow for some tolerance
-    return abs(angle1 - angle2) <= tolerance
+    return getAngleDeviation(line1, line2) <= tolerance
+
+@profiled("helperFuncs.findCurveSegments", lambda args, result: len(result))
+def findCurveSegments(contour):
+    """
+    Return every curve segment of a contour as a list of tuples:
+    [(segmentIndex, prevPt, segment), ...]
 
+    Only segments with exactly 2 bcps are returned,
+    since those are the ones with a connection line to check.
+    """
+    curveSegments = []
+    segments = contour.segments
+    for i, segment in enumerate(segments):
+        if segment.type not in ["curve", "qcurve"] or len(segment.points) != 3:
+            continue
+        prevPt = segments[i - 1].onCurve
+        curveSegments.append((i, prevPt, segment))
+    return curveSegments
+
+@profiled("helperFuncs.findPrevPt")
 def findPrevPt(point, contour, pointType=None):
     """
     Find the matching point from a contour and
@@ -119,6 +160,7 @@ def findPrevPt(point, contour, pointType=None):
         if pt == point:
             return pointsOfType[index - 1]
 
+@profiled("helperFuncs.findNextPt")
 def findNextPt(point, contour, pointType=None):
     """
     Find the matching point from a contour and
@@ -144,9 +186,22 @@ def writeSetting(settingDir, value):
     """
     Write setting to file or make new file if
     setting file doesn't exist.
+
+    Write to a temporary file first and then swap it in,
+    so the setting file is never half-written (eg. when
+    2 RoboFont instances write at the same time).
     """
-    with open(settingDir, "w+") as settingFile:
-        settingFile.write(str(value))
+    settingFolder, settingFileName = os.path.split(settingDir)
+    fd, tempPath = tempfile.mkstemp(prefix=settingFileName, dir=settingFolder)
+    try:
+        with os.fdopen(fd, "w") as settingFile:
+            settingFile.write(str(value))
+        os.chmod(tempPath, 0o644)
+        os.replace(tempPath, settingDir)
+    except OSError:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
 
 if __name__ == "__main__":
     # print(makeRectFromTwoPoints((20, 20), (100, 100), 6))
@@ -0,0 +1,259 @@
+"""
+Check handle parallelism in between masters, not only at them.
+
+Every interpolated segment is a weighted sum of a few fixed arrays
+(the masters of a designspace, or the default outline and gvar deltas
+of a variable font). So are the direction vectors the parallel check
+compares, since they're differences of points. The vectors of all
+segments are stacked into a (B, N, 2, 2) basis once, and each batch
+of sample locations is then a single tensordot of (S, B) weights
+with that basis, followed by one batched deviation pass.
+
+Locations are sampled on a regular grid over the whole design space.
+"""
+
+import itertools
+import numpy as np
+from fontTools.ttLib import TTFont
+from fontTools.designspaceLib import DesignSpaceDocument
+from fontTools.varLib.models import VariationModel, normalizeLocation, supportScalar, piecewiseLinearMap
+
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.glifReader import findCurveSegments
+from comCheckParallelUtils.masterCheck import readMasters, packMasters
+from comCheckParallelUtils.fontAudit import readFontTolerance
+
+SAMPLE_REPORT_FIELDS = ["glyph", "contour", "segment", "defaultDeviation", "worstDeviation", "worstLocation"]
+
+# Upper limit of interpolated vectors held in memory at once, in bytes
+BATCH_BYTES = 64 * 1024 * 1024
+
+class InterpolationSpace:
+    """
+    Segments of a variable font or designspace, as a linear basis.
+
+    keys: [(glyphName, contourIndex, segmentIndex), ...] of length N
+    basis: (B, N, 2, 2) onCurve and bcp direction vectors
+    axes: [(name, minimum, default, maximum), ...] in the font's own coordinates
+    getWeights: function turning a normalized location {name: value}
+    into the (B,) weights of the basis at that location
+    denormalize: function turning a normalized location back
+    into the font's own coordinates
+    """
+    def __init__(self, keys, basis, axes, getWeights, denormalize):
+        self.keys = keys
+        self.basis = basis
+        self.axes = axes
+        self.getWeights = getWeights
+        self.denormalize = denormalize
+
+def readDesignspace(designspacePath):
+    """
+    Return an InterpolationSpace for the masters of a designspace
+    (see masterCheck for how segments are matched)
+    """
+    document = DesignSpaceDocument.fromfile(designspacePath)
+    masterNames, masters, defaultIndex = readMasters(designspacePath)
+    keys, coords, incompatible = packMasters(masters)
+
+    # Designspace locations are in design coordinates
+    axisTriples = {}
+    axes = []
+    for axis in document.axes:
+        triple = tuple(axis.map_forward(value) for value in (axis.minimum, axis.default, axis.maximum))
+        axisTriples[axis.name] = triple
+        axes.append((axis.name,) + triple)
+
+    locations = []
+    for source in document.sources:
+        location = {name: triple[1] for name, triple in axisTriples.items()}
+        location.update(source.location)
+        locations.append(normalizeLocation(location, axisTriples))
+    model = VariationModel(locations, axisOrder=[name for name, *triple in axes])
+
+    def getWeights(location):
+        return np.array(model.getMasterScalars(location), dtype=np.float64)
+
+    return InterpolationSpace(keys, bf.getSegmentVectors(coords), axes, getWeights,
+                              lambda location: _denormalize(location, axes))
+
+def readVariableFont(fontPath):
+    """
+    Return an InterpolationSpace for a TrueType variable font:
+    the default outlines plus one delta row per gvar region.
+    Composite glyphs are left out.
+    """
+    font = TTFont(fontPath)
+    if "gvar" not in font:
+        raise ValueError("%s has no gvar table (only TrueType variable fonts are supported)" % fontPath)
+    glyf = font["glyf"]
+    gvar = font["gvar"]
+    hMetrics = font["hmtx"].metrics
+    vMetrics = font["vmtx"].metrics if "vmtx" in font else None
+    axes = [(axis.axisTag, axis.minValue, axis.defaultValue, axis.maxValue) for axis in font["fvar"].axes]
+
+    keys = []
+    defaultVectors = []
+    # {support: [(first segment, (n, 2, 2) delta vectors), ...]}
+    regionDeltas = {}
+    for glyphName in font.getGlyphOrder():
+        if glyf[glyphName].numberOfContours <= 0:
+            continue
+        coordinates, controls = glyf._getCoordinatesAndControls(glyphName, hMetrics, vMetrics)
+        glyphKeys, pointIndices = _findGlyfSegments(glyphName, controls.endPts, controls.flags)
+        if not glyphKeys:
+            continue
+
+        first = len(keys)
+        keys.extend(glyphKeys)
+        defaultVectors.append(bf.getSegmentVectors(np.array(coordinates, dtype=np.float64)[pointIndices]))
+        for variation in gvar.variations.get(glyphName, []):
+            if None in variation.coordinates:
+                variation.calcInferredDeltas(coordinates, controls.endPts)
+            deltas = np.array([delta or (0, 0) for delta in variation.coordinates], dtype=np.float64)
+            support = tuple(sorted(variation.axes.items()))
+            regionDeltas.setdefault(support, []).append((first, bf.getSegmentVectors(deltas[pointIndices])))
+
+    supports = list(regionDeltas)
+    basis = np.zeros((len(supports) + 1, len(keys), 2, 2), dtype=np.float64)
+    if keys:
+        basis[0] = np.concatenate(defaultVectors)
+    for row, support in enumerate(supports, 1):
+        for first, vectors in regionDeltas[support]:
+            basis[row, first:first + len(vectors)] += vectors
+
+    def getWeights(location):
+        return np.array([1.0] + [supportScalar(location, dict(support)) for support in supports], dtype=np.float64)
+
+    # Samples are in normalized coordinates after avar,
+    # so undo avar before going back to user coordinates
+    avarSegments = font["avar"].segments if "avar" in font else {}
+
+    def denormalize(location):
+        location = dict(location)
+        for tag, mapping in avarSegments.items():
+            if tag in location and mapping:
+                location[tag] = piecewiseLinearMap(location[tag], {mapped: value for value, mapped in mapping.items()})
+        return _denormalize(location, axes)
+
+    return InterpolationSpace(keys, basis, axes, getWeights, denormalize)
+
+def _findGlyfSegments(glyphName, endPts, flags):
+    """
+    Return (keys, pointIndices) for the curve segments of a glyf glyph:
+    pointIndices is an (n, 4) array of the prevPt, bcp 1, bcp 2 and
+    oncurve index of each segment, in the same order as packed segments.
+    Segments are walked like the glyph would be in a UFO.
+    """
+    keys = []
+    pointIndices = []
+    start = 0
+    for contourIndex, end in enumerate(endPts):
+        onCurve = [bool(flags[i] & 1) for i in range(start, end + 1)]
+        # (type, pointIndex, None): the walker only needs point types,
+        # so the point index rides along where x would be
+        points = []
+        for i, isOnCurve in enumerate(onCurve):
+            if not isOnCurve:
+                pointType = "offcurve"
+            elif onCurve[i - 1]:
+                pointType = "line"
+            else:
+                pointType = "qcurve"
+            points.append((pointType, start + i, None))
+        for segmentIndex, prevPt, segment in findCurveSegments(points):
+            keys.append((glyphName, contourIndex, segmentIndex))
+            pointIndices.append([prevPt[1]] + [point[1] for point in segment])
+        start = end + 1
+    return keys, np.array(pointIndices, dtype=np.intp).reshape(-1, 4)
+
+def _denormalize(location, axes):
+    """
+    Turn a normalized location into (name, value) pairs in
+    the axes' own coordinates, ignoring mapping
+    """
+    values = []
+    for name, minimum, default, maximum in axes:
+        value = location.get(name, 0)
+        if value < 0:
+            values.append((name, default + value * (default - minimum)))
+        else:
+            values.append((name, default + value * (maximum - default)))
+    return values
+
+def makeGrid(axes, steps=9):
+    """
+    Return a list of normalized locations {name: value}
+    covering every axis in steps steps (each side of the default
+    gets its share when the default is in the middle)
+    """
+    axisValues = []
+    for name, minimum, default, maximum in axes:
+        lower = -1.0 if minimum < default else 0.0
+        upper = 1.0 if maximum > default else 0.0
+        axisValues.append(np.unique(np.append(np.linspace(lower, upper, steps), 0.0)).tolist())
+    names = [axis[0] for axis in axes]
+    return [dict(zip(names, values)) for values in itertools.product(*axisValues)]
+
+def sampleDeviations(space, locations):
+    """
+    Return (defaultDeviations, worstDeviations, worstSamples),
+    each of shape (N,): deviations at the default location,
+    the worst deviation of each segment over all locations
+    and the index of the location it's at
+    """
+    segmentCount = len(space.keys)
+    weights = np.array([space.getWeights(location) for location in locations]).reshape(len(locations), -1)
+    defaultWeights = space.getWeights({})
+
+    defaultDeviations = bf.getVectorDeviations(*np.tensordot(defaultWeights, space.basis, axes=1).swapaxes(0, 1))
+    worstDeviations = np.full(segmentCount, -1.0)
+    worstSamples = np.zeros(segmentCount, dtype=np.intp)
+
+    batchSize = max(1, BATCH_BYTES // max(segmentCount * 32, 1))
+    for start in range(0, len(locations), batchSize):
+        # (S, N, 2, 2) interpolated vectors of the whole batch at once
+        vectors = np.tensordot(weights[start:start + batchSize], space.basis, axes=1)
+        deviations = bf.getVectorDeviations(vectors[:, :, 0], vectors[:, :, 1])
+        batchWorst = deviations.argmax(axis=0)
+        batchDeviations = deviations[batchWorst, np.arange(segmentCount)]
+        isWorse = batchDeviations > worstDeviations
+        worstDeviations[isWorse] = batchDeviations[isWorse]
+        worstSamples[isWorse] = batchWorst[isWorse] + start
+    return defaultDeviations, worstDeviations, worstSamples
+
+def auditInterpolation(path, tolerance=None, steps=9, reportAll=False):
+    """
+    Sample a designspace or a TrueType variable font and return
+    (tolerance, sampleCount, results). results has a dict for every
+    segment that goes out of tolerance somewhere (or every segment if
+    reportAll), with the keys in SAMPLE_REPORT_FIELDS.
+
+    tolerance defaults to the default master's own tolerance
+    for designspaces, and to the extension's setting for fonts.
+    """
+    if path.endswith(".designspace"):
+        space = readDesignspace(path)
+        if tolerance is None:
+            masterNames, masters, defaultIndex = readMasters(path)
+            tolerance = readFontTolerance(masters[defaultIndex][0])
+    else:
+        space = readVariableFont(path)
+        if tolerance is None:
+            tolerance = readFontTolerance(path)
+
+    locations = makeGrid(space.axes, steps)
+    defaultDeviations, worstDeviations, worstSamples = sampleDeviations(space, locations)
+
+    results = []
+    for i, (glyphName, contourIndex, segmentIndex) in enumerate(space.keys):
+        if not reportAll and worstDeviations[i] <= tolerance:
+            continue
+        location = space.denormalize(locations[worstSamples[i]])
+        results.append({"glyph": glyphName,
+                        "contour": contourIndex,
+                        "segment": segmentIndex,
+                        "defaultDeviation": round(float(defaultDeviations[i]), 4),
+                        "worstDeviation": round(float(worstDeviations[i]), 4),
+                        "worstLocation": " ".join("%s=%g" % (name, round(value, 2)) for name, value in location)})
+    return tolerance, len(locations), results
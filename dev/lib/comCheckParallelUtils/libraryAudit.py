@@ -0,0 +1,198 @@
+"""
+Check a whole library of fonts (UFOs, designspaces or folders of them)
+in one run that can be interrupted and picked up again.
+
+Each font is split into shards of glyphs. Shards go into one queue
+that every worker process pulls from as soon as it's free, so a worker
+that gets small shards (or a small font) just takes more of them and
+no one sits idle while another is stuck with a big font.
+
+Finished shards are appended to a checkpoint file (JSON lines) right away.
+Running again with the same checkpoint skips every shard in it,
+as long as its .glif files haven't changed since.
+"""
+
+import os
+import json
+import hashlib
+import multiprocessing
+
+from fontTools.designspaceLib import DesignSpaceDocument
+
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.glifReader import getGlyphFiles, packGlyphs
+from comCheckParallelUtils.fontAudit import REPORT_FIELDS, makeResults, readFontTolerance
+
+LIBRARY_REPORT_FIELDS = ["font"] + REPORT_FIELDS
+
+def findFonts(paths):
+    """
+    Return the UFOs in paths: UFOs themselves, the sources
+    of designspaces, and both of those found in folders.
+    Each UFO is only listed once.
+    """
+    fontPaths = []
+
+    def addFont(fontPath):
+        fontPath = os.path.realpath(fontPath)
+        if fontPath not in fontPaths:
+            fontPaths.append(fontPath)
+
+    def addPath(path):
+        if path.endswith(".designspace"):
+            for source in DesignSpaceDocument.fromfile(path).sources:
+                addFont(source.path)
+        elif path.endswith(".ufo"):
+            addFont(path)
+        elif os.path.isdir(path):
+            for dirPath, dirNames, fileNames in os.walk(path):
+                dirNames.sort()
+                for name in sorted(fileNames):
+                    if name.endswith(".designspace"):
+                        addPath(os.path.join(dirPath, name))
+                for name in [name for name in dirNames if name.endswith(".ufo")]:
+                    addFont(os.path.join(dirPath, name))
+                    # Don't look inside UFOs
+                    dirNames.remove(name)
+
+    for path in paths:
+        addPath(path)
+    return fontPaths
+
+def makeShards(fontPaths, shardSize=200):
+    """
+    Split fonts into shards of up to shardSize glyphs:
+    [(key, fontPath, glyphNames, fileNames), ...]
+
+    key changes whenever one of the shard's .glif files does,
+    so a checkpointed shard is only reused if it's still current.
+    """
+    shards = []
+    for fontPath in fontPaths:
+        glyphFiles = getGlyphFiles(fontPath)
+        glyphsDir = os.path.join(fontPath, "glyphs")
+        for i in range(0, len(glyphFiles), shardSize):
+            chunk = glyphFiles[i:i + shardSize]
+            shardHash = hashlib.blake2b(fontPath.encode("utf-8"), digest_size=16)
+            for glyphName, fileName in chunk:
+                fileStat = os.stat(os.path.join(glyphsDir, fileName))
+                shardHash.update(("|%s|%d|%d" % (fileName, fileStat.st_size, fileStat.st_mtime_ns)).encode("utf-8"))
+            shards.append((shardHash.hexdigest(), fontPath,
+                           [glyphName for glyphName, fileName in chunk],
+                           [fileName for glyphName, fileName in chunk]))
+    return shards
+
+def checkShard(shard):
+    """
+    Check one shard and return (key, rows), where rows are
+    [(glyphName, contourIndex, segmentIndex, deviation), ...].
+    Deviations don't depend on the tolerance, so neither does the checkpoint.
+    """
+    key, fontPath, glyphNames, fileNames = shard
+    offsets, indices, coords, sources = packGlyphs(os.path.join(fontPath, "glyphs"), fileNames)
+    deviations = bf.getAngleDeviations(coords)[sources].tolist()
+    indices = indices.tolist()
+    rows = []
+    for glyphName, start, end in zip(glyphNames, offsets[:-1].tolist(), offsets[1:].tolist()):
+        for (contourIndex, segmentIndex), deviation in zip(indices[start:end], deviations[start:end]):
+            rows.append((glyphName, contourIndex, segmentIndex, deviation))
+    return key, rows
+
+def readCheckpoint(checkpointPath):
+    """
+    Return {key: rows} of the shards in a checkpoint file.
+    A half written last line (from a crash) is ignored.
+    """
+    finished = {}
+    if not os.path.exists(checkpointPath):
+        return finished
+    with open(checkpointPath, "r", encoding="utf-8") as checkpointFile:
+        for line in checkpointFile:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            finished[entry["shard"]] = [tuple(row) for row in entry["rows"]]
+    return finished
+
+def auditLibrary(fontPaths, tolerance=None, workers=None, shardSize=200,
+                 checkpointPath=None, progressCallback=None):
+    """
+    Check every glyph of every font and return one list of results
+    (see fontAudit.makeResults(), plus a "font" key), in font and glyph order.
+
+    tolerance defaults to each font's own tolerance.
+    progressCallback, if given, is called with (finishedShards, totalShards).
+    """
+    shards = makeShards(fontPaths, shardSize)
+    finished = readCheckpoint(checkpointPath) if checkpointPath is not None else {}
+    todo = [shard for shard in shards if shard[0] not in finished]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    finishedCount = len(shards) - len(todo)
+    checkpointFile = _openCheckpoint(checkpointPath) if checkpointPath is not None else None
+    try:
+        for key, rows in _runShards(todo, workers):
+            finished[key] = rows
+            if checkpointFile is not None:
+                checkpointFile.write(json.dumps({"shard": key, "rows": rows}) + "\n")
+                checkpointFile.flush()
+                os.fsync(checkpointFile.fileno())
+            finishedCount += 1
+            if progressCallback is not None:
+                progressCallback(finishedCount, len(shards))
+    finally:
+        if checkpointFile is not None:
+            checkpointFile.close()
+
+    return _mergeShards(shards, finished, tolerance)
+
+def _openCheckpoint(checkpointPath):
+    """
+    Open a checkpoint file for appending, starting a new line
+    if the last one was cut off
+    """
+    checkpointFile = open(checkpointPath, "a", encoding="utf-8")
+    if checkpointFile.tell() > 0:
+        with open(checkpointPath, "rb") as lastLine:
+            lastLine.seek(-1, os.SEEK_END)
+            if lastLine.read(1) != b"\n":
+                checkpointFile.write("\n")
+    return checkpointFile
+
+def _runShards(shards, workers):
+    """
+    Yield (key, rows) of each shard as it's finished
+    """
+    if workers == 1 or len(shards) <= 1:
+        for shard in shards:
+            yield checkShard(shard)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        # One shard at a time, so free workers always take the next one
+        yield from pool.imap_unordered(checkShard, shards, chunksize=1)
+
+def getFontTolerances(fontPaths, tolerance=None):
+    """
+    Return {fontPath: tolerance} of the tolerance each font is checked with:
+    tolerance if given, otherwise the font's own (see fontAudit.readFontTolerance())
+    """
+    if tolerance is not None:
+        return {fontPath: tolerance for fontPath in fontPaths}
+    return {fontPath: readFontTolerance(fontPath) for fontPath in fontPaths}
+
+def _mergeShards(shards, finished, tolerance):
+    results = []
+    fontTolerances = getFontTolerances(sorted({shard[1] for shard in shards}), tolerance)
+    for key, fontPath, glyphNames, fileNames in shards:
+        fontTolerance = fontTolerances[fontPath]
+        glyphSegments = {glyphName: [] for glyphName in glyphNames}
+        for glyphName, contourIndex, segmentIndex, deviation in finished[key]:
+            glyphSegments[glyphName].append((contourIndex, segmentIndex, deviation))
+        for glyphName in glyphNames:
+            for result in makeResults(glyphName, glyphSegments[glyphName], fontTolerance):
+                results.append(dict(font=fontPath, **result))
+    return results
@@ -0,0 +1,73 @@
+"""
+Spatial index of the lines connecting BCPs, for hit testing.
+
+Lines are put in a uniform grid of square cells. Finding the
+line under the cursor only looks at the lines in one cell,
+instead of testing every segment in the glyph.
+"""
+
+import math
+
+import comCheckParallelUtils.helperFuncs as hf
+
+class ConnectionLineIndex:
+    """
+    Grid of every connection line (bcp to bcp) in a glyph.
+    Built once per glyph change (see SelectionCache).
+    """
+    def __init__(self, glyph=None, cellSize=64):
+        self.cellSize = cellSize
+        # {(column, row): [(x0, y0, x1, y1, length, (prevPt, segment)), ...]}
+        self._cells = {}
+        if glyph is not None:
+            for contour in glyph:
+                for segmentIndex, prevPt, segment in hf.findCurveSegments(contour):
+                    self.addSegment(prevPt, segment)
+
+    def addSegment(self, prevPt, segment):
+        """
+        Add the connection line of a curve segment
+        to every cell it could be clicked in
+        """
+        h1, h2, pt = segment
+        x0, y0, x1, y1 = h1.x, h1.y, h2.x, h2.y
+        length = math.hypot(x1 - x0, y1 - y0)
+
+        # isPointInLine() accepts points in an ellipse around the line.
+        # Pad the line's bounds by the ellipse's half-width
+        # at the largest tolerance, so no hit can fall outside.
+        maxTolerance = hf.getLineTolerance(float("inf"))
+        padding = math.sqrt(2 * length * maxTolerance + maxTolerance ** 2) / 2
+
+        entry = (x0, y0, x1, y1, length, (prevPt, segment))
+        cellSize = self.cellSize
+        for column in range(int(math.floor((min(x0, x1) - padding) / cellSize)),
+                            int(math.floor((max(x0, x1) + padding) / cellSize)) + 1):
+            for row in range(int(math.floor((min(y0, y1) - padding) / cellSize)),
+                             int(math.floor((max(y0, y1) + padding) / cellSize)) + 1):
+                self._cells.setdefault((column, row), []).append(entry)
+
+    def findLine(self, point, scale):
+        """
+        Return (prevPt, segment) of the connection line
+        under point (an (x, y) tuple), or None.
+        The same tuple is returned every time for the same line.
+
+        Uses the same zoom-dependent tolerance as hf.isPointInLine().
+        If lines overlap, the closest one wins.
+        """
+        x, y = point
+        candidates = self._cells.get((int(math.floor(x / self.cellSize)),
+                                      int(math.floor(y / self.cellSize))))
+        if not candidates:
+            return None
+
+        tolerance = hf.getLineTolerance(scale)
+        found = None
+        closest = tolerance
+        for x0, y0, x1, y1, length, selected in candidates:
+            distance = math.hypot(x - x0, y - y0) + math.hypot(x - x1, y - y1) - length
+            if distance < closest:
+                closest = distance
+                found = selected
+        return found
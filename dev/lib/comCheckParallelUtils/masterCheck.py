@@ -0,0 +1,132 @@
+"""
+Check that curve segments are parallel (or not) in the
+same way across all masters of a designspace.
+
+A segment that is parallel in some masters and not in others
+interpolates into lumpy curves in between. Segments are matched
+by glyph, contour index and segment index, and the segments of all
+masters are packed into one aligned (M, N, 4, 2) array (M masters,
+N segments), so every master is checked in a single batch.
+
+Only glyphs that are in every master, and only segments
+that every master has, are compared.
+"""
+
+import os
+import numpy as np
+from fontTools.designspaceLib import DesignSpaceDocument
+
+import comCheckParallelUtils.batchFuncs as bf
+from comCheckParallelUtils.glifReader import getLayerDir, getGlyphFiles, readGlifContours, findCurveSegments
+from comCheckParallelUtils.fontAudit import readFontTolerance
+
+MASTER_REPORT_FIELDS = ["glyph", "contour", "segment", "spread", "notParallelIn"]
+
+def readMasters(designspacePath):
+    """
+    Return (masterNames, [(ufoPath, layerName), ...], defaultIndex)
+    for the sources of a designspace
+    """
+    document = DesignSpaceDocument.fromfile(designspacePath)
+    masterNames = []
+    masters = []
+    default = document.findDefault()
+    defaultIndex = 0
+    for source in document.sources:
+        if source is default:
+            defaultIndex = len(masters)
+        name = source.name or os.path.splitext(os.path.basename(source.path))[0]
+        if source.layerName is not None:
+            name += " (%s)" % source.layerName
+        masterNames.append(name)
+        masters.append((source.path, source.layerName))
+    return masterNames, masters, defaultIndex
+
+def packMasters(masters):
+    """
+    Read every master and return (keys, coords, incompatible):
+
+    keys: [(glyphName, contourIndex, segmentIndex), ...] of length N
+    coords: (M, N, 4, 2) segments, aligned across masters
+    incompatible: names of glyphs whose curve segments don't match
+    in every master (only the ones they share are in keys)
+    """
+    masterGlyphs = []
+    for ufoPath, layerName in masters:
+        masterGlyphs.append((getLayerDir(ufoPath, layerName), dict(getGlyphFiles(ufoPath, layerName))))
+
+    # Glyph order of the first master
+    firstPath, firstLayer = masters[0]
+    glyphNames = [glyphName for glyphName, fileName in getGlyphFiles(firstPath, firstLayer)
+                  if all(glyphName in files for glyphsDir, files in masterGlyphs)]
+
+    keys = []
+    values = [[] for master in masters]
+    incompatible = []
+    for glyphName in glyphNames:
+        masterSegments = []
+        for glyphsDir, files in masterGlyphs:
+            contours = readGlifContours(os.path.join(glyphsDir, files[glyphName]))
+            segments = {}
+            for contourIndex, points in enumerate(contours):
+                for segmentIndex, prevPt, (bcp1, bcp2, pt) in findCurveSegments(points):
+                    segments[contourIndex, segmentIndex] = (prevPt[1], prevPt[2], bcp1[1], bcp1[2],
+                                                            bcp2[1], bcp2[2], pt[1], pt[2])
+            masterSegments.append(segments)
+
+        shared = [key for key in masterSegments[0] if all(key in segments for segments in masterSegments)]
+        if any(len(segments) != len(shared) for segments in masterSegments):
+            incompatible.append(glyphName)
+        for contourIndex, segmentIndex in shared:
+            keys.append((glyphName, contourIndex, segmentIndex))
+            for masterValues, segments in zip(values, masterSegments):
+                masterValues.extend(segments[contourIndex, segmentIndex])
+
+    coords = np.array(values, dtype=np.float64).reshape(len(masters), -1, 4, 2)
+    return keys, coords, incompatible
+
+def checkConsistency(coords, tolerance=0):
+    """
+    Return (deviations, inconsistent) for (M, N, 4, 2) aligned segments:
+    (M, N) angle deviations and an (N,) mask of segments that are
+    parallel in some masters but not in others
+    """
+    masterCount, segmentCount = coords.shape[:2]
+    deviations = bf.getAngleDeviations(coords.reshape(-1, 4, 2)).reshape(masterCount, segmentCount)
+    parallel = deviations <= tolerance
+    inconsistent = parallel.any(axis=0) & ~parallel.all(axis=0)
+    return deviations, inconsistent
+
+def auditDesignspace(designspacePath, tolerance=None, reportAll=False):
+    """
+    Return (masterNames, tolerance, results, incompatible).
+
+    results has a dict for every inconsistent segment (or every segment
+    if reportAll), with the keys in MASTER_REPORT_FIELDS plus each
+    master's deviation under its name. spread is how far apart the
+    deviations are across masters.
+
+    tolerance defaults to the default master's own tolerance.
+    """
+    masterNames, masters, defaultIndex = readMasters(designspacePath)
+    if tolerance is None:
+        tolerance = readFontTolerance(masters[defaultIndex][0])
+
+    keys, coords, incompatible = packMasters(masters)
+    deviations, inconsistent = checkConsistency(coords, tolerance)
+    spreads = (deviations.max(axis=0) - deviations.min(axis=0)).tolist() if keys else []
+
+    results = []
+    columns = deviations.T.tolist()
+    for i in (range(len(keys)) if reportAll else np.flatnonzero(inconsistent).tolist()):
+        glyphName, contourIndex, segmentIndex = keys[i]
+        result = {"glyph": glyphName,
+                  "contour": contourIndex,
+                  "segment": segmentIndex,
+                  "spread": round(spreads[i], 4),
+                  "notParallelIn": ";".join(name for name, deviation in zip(masterNames, columns[i])
+                                            if deviation > tolerance)}
+        for name, deviation in zip(masterNames, columns[i]):
+            result[name] = round(deviation, 4)
+        results.append(result)
+    return masterNames, tolerance, results, incompatible
@@ -0,0 +1,87 @@
+"""
+Index of the neighbors of every point in a glyph.
+
+helperFuncs.findNextPt() and findPrevPt() filter and scan
+the whole contour every time they're called. The index
+is built once per glyph change (see SelectionCache),
+after which finding a neighbor is a dict lookup.
+"""
+
+class PointIndex:
+    """
+    Map each point to the previous and next oncurve
+    and offcurve points in its contour.
+
+    As with findPrevPt() and findNextPt(), "oncurve"
+    means any point that isn't an offcurve, and contours
+    wrap around (the point after the last one is the first one).
+    """
+    def __init__(self, glyph=None):
+        # {point: (prevOnCurve, nextOnCurve, prevOffCurve, nextOffCurve)}
+        self._neighbors = {}
+        if glyph is not None:
+            for contour in glyph:
+                self.addContour(contour)
+
+    def addContour(self, contour):
+        """
+        Add neighbors of every point in contour
+        """
+        points = contour.points
+        isOffCurve = [pt.type == "offcurve" for pt in points]
+        prevOn, nextOn = self._findNeighbors(points, [not offCurve for offCurve in isOffCurve])
+        prevOff, nextOff = self._findNeighbors(points, isOffCurve)
+        for i, pt in enumerate(points):
+            self._neighbors[pt] = (prevOn[i], nextOn[i], prevOff[i], nextOff[i])
+
+    def prevPt(self, point, pointType=None):
+        """
+        Return the PREV point of the specified type.
+        If pointType isn't specified, look for non-offcurves
+        """
+        neighbors = self._neighbors.get(point)
+        if neighbors is None:
+            return None
+        return neighbors[2] if pointType == "offcurve" else neighbors[0]
+
+    def nextPt(self, point, pointType=None):
+        """
+        Return the NEXT point of the specified type.
+        If pointType isn't specified, look for non-offcurves
+        """
+        neighbors = self._neighbors.get(point)
+        if neighbors is None:
+            return None
+        return neighbors[3] if pointType == "offcurve" else neighbors[1]
+
+    def _findNeighbors(self, points, isOfType):
+        """
+        For every point, find the closest point of a type before and after it,
+        in two passes around the contour. Returns 2 lists (prev, next),
+        which hold None if the contour has no points of that type.
+        """
+        count = len(points)
+        prevPts = [None] * count
+        nextPts = [None] * count
+
+        # Start from the last point of the type, so the first
+        # points of the contour wrap around to it
+        last = None
+        for i in range(count):
+            if isOfType[i]:
+                last = points[i]
+        for i in range(count):
+            prevPts[i] = last
+            if isOfType[i]:
+                last = points[i]
+
+        first = None
+        for i in reversed(range(count)):
+            if isOfType[i]:
+                first = points[i]
+        for i in reversed(range(count)):
+            nextPts[i] = first
+            if isOfType[i]:
+                first = points[i]
+
+        return prevPts, nextPts
@@ -0,0 +1,216 @@
+"""
+Opt-in instrumentation of the extension's hot paths.
+
+Functions decorated with @profiled() record how long each call took
+(and how many segments it went through) in a ring buffer, but only
+while the profiler is enabled. When it's off, the decorated functions
+only check a flag before calling through. From the Python console:
+
+    from comCheckParallelUtils.profiler import profiler
+    profiler.enable()
+    # ...use the guides and the tool...
+    profiler.getStats()
+    profiler.exportJSON("~/Desktop/checkParallel.json")
+    profiler.exportChromeTrace("~/Desktop/checkParallel.trace.json")
+
+Chrome traces can be opened in chrome://tracing or https://ui.perfetto.dev
+The same can be done from the Profiler window (showProfiler.py).
+"""
+
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+class Profiler:
+    """
+    Call counts and totals are kept for every call since the last clear(),
+    latency percentiles are computed from the last maxRecords calls.
+    """
+    def __init__(self, maxRecords=20000):
+        self.enabled = False
+        # (name, start, duration, segments, threadId)
+        self._records = deque(maxlen=maxRecords)
+        # {name: [calls, totalTime, totalSegments]}
+        self._totals = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """
+        Start recording every @profiled function
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop recording
+        """
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+            self._origin = time.perf_counter()
+
+    def record(self, name, start, duration, segments=None):
+        """
+        Record one call. start is a time.perf_counter() value,
+        duration is in seconds.
+        """
+        with self._lock:
+            self._records.append((name, start, duration, segments, threading.get_ident()))
+            totals = self._totals.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            if segments is not None:
+                totals[2] += segments
+
+    def profiled(self, name=None, countSegments=None):
+        """
+        Decorator recording calls to a function or method
+        while the profiler is enabled.
+
+        The wrapper checks whether the profiler is enabled on every
+        call, so it works wherever the function is defined or called
+        from (including scripts run as __main__), at the cost of one
+        flag check when the profiler is off.
+
+        countSegments, if given, is called with (args, result)
+        after each call and returns the number of segments processed.
+        """
+        def decorator(func):
+            recordName = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                duration = time.perf_counter() - start
+                segments = countSegments(args, result) if countSegments is not None else None
+                self.record(recordName, start, duration, segments)
+                return result
+
+            return wrapper
+        return decorator
+
+    def getStats(self):
+        """
+        Return {name: stats} with call count, total and mean time,
+        p50 / p95 / p99 latency and segments per call.
+        Times are in milliseconds.
+        """
+        with self._lock:
+            records = list(self._records)
+            totals = {name: list(values) for name, values in self._totals.items()}
+
+        durations = {}
+        for name, start, duration, segments, threadId in records:
+            durations.setdefault(name, []).append(duration)
+
+        stats = {}
+        for name, (calls, totalTime, totalSegments) in totals.items():
+            recent = sorted(durations.get(name, []))
+            stats[name] = {"calls": calls,
+                           "totalMs": totalTime * 1000,
+                           "meanMs": totalTime * 1000 / calls,
+                           "p50Ms": _percentile(recent, 50) * 1000,
+                           "p95Ms": _percentile(recent, 95) * 1000,
+                           "p99Ms": _percentile(recent, 99) * 1000,
+                           "segmentsPerCall": totalSegments / calls}
+        return stats
+
+    def exportJSON(self, path=None):
+        """
+        Return stats and the recorded calls as a JSON string,
+        and write it to path if one is given
+        """
+        with self._lock:
+            records = list(self._records)
+            origin = self._origin
+        data = {"stats": self.getStats(),
+                "calls": [{"name": name,
+                           "startMs": (start - origin) * 1000,
+                           "durationMs": duration * 1000,
+                           "segments": segments}
+                          for name, start, duration, segments, threadId in records]}
+        return _dump(data, path)
+
+    def exportChromeTrace(self, path=None):
+        """
+        Return the recorded calls in Chrome's trace event format
+        as a JSON string, and write it to path if one is given
+        """
+        with self._lock:
+            records = list(self._records)
+            origin = self._origin
+        pid = os.getpid()
+        events = []
+        for name, start, duration, segments, threadId in records:
+            event = {"name": name,
+                     "cat": "checkParallel",
+                     "ph": "X",
+                     "ts": (start - origin) * 1e6,
+                     "dur": duration * 1e6,
+                     "pid": pid,
+                     "tid": threadId}
+            if segments is not None:
+                event["args"] = {"segments": segments}
+            events.append(event)
+        return _dump({"traceEvents": events, "displayTimeUnit": "ms"}, path)
+
+
+class FrameStats:
+    """
+    Timings of the last few frames drawn by DrawingDelegate,
+    for the diagnostics readout in GuideStatusView.
+    Unlike the profiler, this only tracks one number per frame.
+    """
+    def __init__(self, maxFrames=120):
+        self._durations = deque(maxlen=maxFrames)
+        self.lastDuration = 0.0
+        self.segmentCount = 0
+        self.cacheHit = False
+
+    def addFrame(self, duration, segmentCount, cacheHit):
+        self._durations.append(duration)
+        self.lastDuration = duration
+        self.segmentCount = segmentCount
+        self.cacheHit = cacheHit
+
+    def getP95(self):
+        """
+        Rolling 95th percentile frame time, in seconds
+        """
+        return _percentile(sorted(self._durations), 95)
+
+
+def _percentile(sortedValues, percent):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sortedValues:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(sortedValues))) - 1, 0)
+    return sortedValues[min(rank, len(sortedValues) - 1)]
+
+def _dump(data, path):
+    text = json.dumps(data, indent=1)
+    if path is not None:
+        with open(os.path.expanduser(path), "w") as outFile:
+            outFile.write(text)
+    return text
+
+
+profiler = Profiler()
+
+def profiled(name=None, countSegments=None):
+    """
+    Shortcut for profiler.profiled()
+    """
+    return profiler.profiled(name, countSegments)
@@ -0,0 +1,75 @@
+"""
+Window to turn the profiler on and off, look at stats
+and export them (see profiler.py).
+"""
+
+from vanilla import FloatingWindow, CheckBox, Button, TextEditor
+from mojo.UI import PutFile
+from comCheckParallelUtils.profiler import profiler
+
+class ProfilerWindow:
+    def __init__(self):
+        self.w = FloatingWindow((480, 320), "Check Parallel Profiler", minSize=(400, 200))
+        self.w.recordCheckBox = CheckBox((10, 10, 100, 20),
+                                         "Record",
+                                         value=profiler.enabled,
+                                         sizeStyle="small",
+                                         callback=self.recordCheckBoxCB)
+        self.w.refreshButton = Button((-250, 10, 70, 20),
+                                      "Refresh",
+                                      sizeStyle="small",
+                                      callback=self.refreshButtonCB)
+        self.w.clearButton = Button((-170, 10, 70, 20),
+                                    "Clear",
+                                    sizeStyle="small",
+                                    callback=self.clearButtonCB)
+        self.w.statsText = TextEditor((10, 40, -10, -40), readOnly=True)
+        self.w.jsonButton = Button((10, -30, 140, 20),
+                                   "Export JSON…",
+                                   sizeStyle="small",
+                                   callback=self.jsonButtonCB)
+        self.w.traceButton = Button((160, -30, 140, 20),
+                                    "Export Chrome Trace…",
+                                    sizeStyle="small",
+                                    callback=self.traceButtonCB)
+        self.refreshStats()
+
+    def recordCheckBoxCB(self, sender):
+        if sender.get():
+            profiler.enable()
+        else:
+            profiler.disable()
+
+    def refreshButtonCB(self, sender):
+        self.refreshStats()
+
+    def clearButtonCB(self, sender):
+        profiler.clear()
+        self.refreshStats()
+
+    def jsonButtonCB(self, sender):
+        path = PutFile("Export profile", "checkParallelProfile.json")
+        if path:
+            profiler.exportJSON(path)
+
+    def traceButtonCB(self, sender):
+        path = PutFile("Export Chrome trace", "checkParallelTrace.json")
+        if path:
+            profiler.exportChromeTrace(path)
+
+    def refreshStats(self):
+        """
+        Show stats as a table, slowest total first
+        """
+        stats = profiler.getStats()
+        lines = ["%-36s %7s %9s %8s %8s %8s" % ("", "calls", "total ms", "p50 ms", "p95 ms", "segs")]
+        for name, stat in sorted(stats.items(), key=lambda item: -item[1]["totalMs"]):
+            lines.append("%-36s %7d %9.1f %8.3f %8.3f %8.1f" % (name, stat["calls"], stat["totalMs"],
+                                                               stat["p50Ms"], stat["p95Ms"],
+                                                               stat["segmentsPerCall"]))
+        self.w.statsText.set("\n".join(lines))
+
+
+if __name__ == "__main__":
+    profilerWindow = ProfilerWindow()
+    profilerWindow.w.open()
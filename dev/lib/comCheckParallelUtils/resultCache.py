@@ -0,0 +1,101 @@
+"""
+On-disk cache of font audit results.
+
+Each glyph is keyed by a hash of its contour geometry
+(point types and coordinates), and its entry holds the angle
+deviation of every curve segment. Deviations don't depend on the
+tolerance, so one entry serves every tolerance: whether a segment
+is parallel is worked out again (deviation <= tolerance) on the way out.
+
+Glyphs that haven't changed since the last audit are read back
+instead of checked again, whichever font they're in.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+
+# Bump when the way deviations are computed changes,
+# so old entries are thrown away
+CACHE_VERSION = 1
+
+def getCacheDir():
+    """
+    Return the user's cache folder for the extension
+    """
+    if sys.platform == "darwin":
+        baseDir = os.path.expanduser("~/Library/Caches")
+    elif sys.platform == "win32":
+        baseDir = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        baseDir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(baseDir, "com.checkParallelTool")
+
+def getDefaultCachePath():
+    return os.path.join(getCacheDir(), "auditResults.sqlite")
+
+def getGeometryHash(glyph):
+    """
+    Return a hash of the glyph's contours.
+    Anything that doesn't change the outline
+    (name, anchors, selection, etc.) is left out.
+    """
+    geometryHash = hashlib.blake2b(digest_size=20)
+    for contour in glyph:
+        points = [(point.type, point.x, point.y) for point in contour.points]
+        geometryHash.update(repr(points).encode("utf-8"))
+        geometryHash.update(b"|")
+    return geometryHash.hexdigest()
+
+class ResultCache:
+    """
+    SQLite table of {geometry hash: [(contourIndex, segmentIndex, deviation), ...]}
+
+    Several processes can read at the same time, but entries
+    should be written from one (see fontAudit.auditFont()).
+    """
+    def __init__(self, cachePath=None):
+        self.cachePath = cachePath or getDefaultCachePath()
+        cacheDir = os.path.dirname(self.cachePath)
+        if cacheDir:
+            os.makedirs(cacheDir, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.cachePath, timeout=30)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        with self._connection:
+            if version != CACHE_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS glyphs")
+                self._connection.execute("PRAGMA user_version = %d" % CACHE_VERSION)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS glyphs "
+                                     "(hash TEXT PRIMARY KEY, segments TEXT NOT NULL)")
+
+    def get(self, geometryHash):
+        """
+        Return the cached segments for a glyph, or None
+        """
+        row = self._connection.execute("SELECT segments FROM glyphs WHERE hash = ?",
+                                       (geometryHash,)).fetchone()
+        if row is None:
+            return None
+        return [tuple(segment) for segment in json.loads(row[0])]
+
+    def putMany(self, entries):
+        """
+        Store (geometryHash, segments) entries in one transaction
+        """
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO glyphs VALUES (?, ?)",
+                                         ((geometryHash, json.dumps(segments))
+                                          for geometryHash, segments in entries))
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute("DELETE FROM glyphs")
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM glyphs").fetchone()[0]
@@ -0,0 +1,82 @@
+"""
+Cache for selection analysis, so redrawing the glyph view
+doesn't mean walking every contour and segment again.
+
+Entries are kept per glyph (glyph windows showing the same glyph
+share an entry) and are only thrown out when the glyph posts
+a change or a selection change notification.
+Only the most recently used glyphs are kept.
+"""
+
+from collections import OrderedDict
+
+class SelectionCache:
+    """
+    LRU of per-glyph entries. Each entry is a dict that
+    callers can store analysis results in:
+
+    "selection" and "selectionLines" are dropped whenever
+    the selection changes, everything is dropped whenever
+    the glyph changes.
+    """
+    selectionKeys = ["selection", "selectionLines"]
+
+    def __init__(self, maxSize=32):
+        self.maxSize = maxSize
+        self._entries = OrderedDict()
+        self._glyphs = {}
+
+    def getEntry(self, glyph):
+        """
+        Return the entry dict for glyph (a fontParts glyph),
+        starting to watch the glyph if it isn't cached yet
+        """
+        nakedGlyph = glyph.naked()
+        key = id(nakedGlyph)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = {}
+        self._entries[key] = entry
+        self._glyphs[key] = nakedGlyph
+        nakedGlyph.addObserver(self, "_glyphChangedCB", "Glyph.Changed")
+        nakedGlyph.addObserver(self, "_selectionChangedCB", "Glyph.SelectionChanged")
+
+        while len(self._entries) > self.maxSize:
+            oldKey, _ = self._entries.popitem(last=False)
+            self._stopWatching(oldKey)
+        return entry
+
+    def clear(self):
+        """
+        Forget every glyph
+        """
+        for key in list(self._entries):
+            self._stopWatching(key)
+        self._entries.clear()
+
+    def _stopWatching(self, key):
+        nakedGlyph = self._glyphs.pop(key)
+        nakedGlyph.removeObserver(self, "Glyph.Changed")
+        nakedGlyph.removeObserver(self, "Glyph.SelectionChanged")
+
+    def _glyphChangedCB(self, notification):
+        """
+        Glyph was edited, so everything we know about it is stale
+        """
+        entry = self._entries.get(id(notification.object))
+        if entry is not None:
+            entry.clear()
+
+    def _selectionChangedCB(self, notification):
+        """
+        Selection changed, but the contours didn't
+        """
+        entry = self._entries.get(id(notification.object))
+        if entry is None:
+            return
+        for entryKey in self.selectionKeys:
+            entry.pop(entryKey, None)
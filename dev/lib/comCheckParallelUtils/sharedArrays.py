@@ -0,0 +1,59 @@
+"""
+NumPy arrays in shared memory, to pass big results between
+processes without pickling them through a pipe.
+
+One process creates the array and sends its spec (a small tuple)
+to another, which attaches to the same memory by name.
+Whoever is done with it last unlinks it.
+"""
+
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+class SharedArray:
+    """
+    A NumPy array (self.array) backed by a shared memory block.
+    Creates a new block, or attaches to an existing one if name is given.
+    """
+    def __init__(self, shape, dtype, name=None):
+        dtype = np.dtype(dtype)
+        shape = tuple(shape)
+        if name is None:
+            # Blocks can't be empty
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            self._memory = SharedMemory(create=True, size=size)
+        else:
+            self._memory = SharedMemory(name=name)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._memory.buf)
+        self.spec = (self._memory.name, shape, dtype.str)
+
+    @classmethod
+    def fromArray(cls, array):
+        """
+        Copy an array into a new shared block
+        """
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Attach to the block another process created
+        """
+        name, shape, dtype = spec
+        return cls(shape, dtype, name)
+
+    def close(self):
+        """
+        Let go of this process's view of the block
+        (the array can't be used after this)
+        """
+        self.array = None
+        self._memory.close()
+
+    def unlink(self):
+        """
+        Free the block (once every process has closed it)
+        """
+        self._memory.unlink()
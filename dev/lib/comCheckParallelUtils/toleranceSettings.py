@@ -0,0 +1,120 @@
+"""
+Tolerance setting shared by the whole extension.
+
+The value is read from resources/toleranceSetting.txt once
+and then kept in memory. Changes are passed on to listeners
+right away, but only written to disk after the value has stopped
+changing for a moment (eg. when the user lets go of the slider).
+
+A font can have its own tolerance in font.lib,
+which takes precedence over the global setting.
+"""
+
+import os.path
+import atexit
+import threading
+
+import comCheckParallelUtils.helperFuncs as hf
+
+currentDir = os.path.dirname(__file__)
+settingDir = os.path.join(currentDir, "..", "..", "resources", "toleranceSetting.txt")
+
+LIB_KEY = "com.checkParallelTool.tolerance"
+
+class ToleranceSettings:
+    """
+    In-memory tolerance setting with debounced persistence
+    """
+    def __init__(self, settingPath, writeDelay=0.5):
+        self.settingPath = settingPath
+        self.writeDelay = writeDelay
+
+        self._tolerance = hf.readSetting(settingPath)
+        self._listeners = []
+        self._writeTimer = None
+        self._lock = threading.Lock()
+
+    def getTolerance(self, font=None):
+        """
+        Return the font's own tolerance if it has one,
+        otherwise the global tolerance
+        """
+        if font is not None:
+            fontTolerance = font.lib.get(LIB_KEY)
+            if fontTolerance is not None:
+                return float(fontTolerance)
+        return self._tolerance
+
+    def setTolerance(self, value, font=None):
+        """
+        Set the global tolerance, or the font's own tolerance
+        if a font is passed in, and tell listeners
+        """
+        value = float(value)
+        if font is not None:
+            font.lib[LIB_KEY] = value
+        else:
+            self._tolerance = value
+            self._scheduleWrite()
+        self._notify(font)
+
+    def hasFontTolerance(self, font):
+        """
+        Return True if the font has its own tolerance
+        """
+        return font is not None and LIB_KEY in font.lib
+
+    def clearFontTolerance(self, font):
+        """
+        Remove the font's own tolerance,
+        so it uses the global one again
+        """
+        if self.hasFontTolerance(font):
+            del font.lib[LIB_KEY]
+            self._notify(font)
+
+    def addListener(self, callback):
+        """
+        callback is called with (settings, font) whenever
+        a tolerance changes. font is None for the global one.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def removeListener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def flush(self):
+        """
+        Write a pending change to disk right away
+        """
+        with self._lock:
+            if self._writeTimer is None:
+                return
+            self._writeTimer.cancel()
+            self._writeTimer = None
+            tolerance = self._tolerance
+        hf.writeSetting(self.settingPath, tolerance)
+
+    def _scheduleWrite(self):
+        """
+        (Re)start the timer, so only the last
+        of a quick series of changes is written
+        """
+        with self._lock:
+            if self._writeTimer is not None:
+                self._writeTimer.cancel()
+            self._writeTimer = threading.Timer(self.writeDelay, self.flush)
+            self._writeTimer.daemon = True
+            self._writeTimer.start()
+
+    def _notify(self, font):
+        for callback in list(self._listeners):
+            callback(self, font)
+
+
+toleranceSettings = ToleranceSettings(settingDir)
+
+# Don't lose the last change if RoboFont quits right after it
+atexit.register(toleranceSettings.flush)
@@ -1,34 +1,41 @@
 """
 Use this window to set tolerance level.
-Read and write to resources/toleranceSetting.txt for persistance.
+The value is kept in toleranceSettings, which saves it to
+resources/toleranceSetting.txt (or the font's lib) for persistance.
 
-When a level has been set, save value and post event.
-The CheckParallel tool has an observer
-to notify it to read the setting whenever it changes.
+When a level has been set, update the setting.
+toleranceSettings tells its listeners (the CheckParallel tool)
+whenever the setting changes.
+
+The controls show the current font's setting, and are
+refreshed whenever another font becomes current.
 """
 
-import os.path
 from mojo.UI import ShowHideWindow
-from vanilla import FloatingWindow, Slider, Button, TextBox
-from mojo.events import postEvent
-import comCheckParallelUtils.helperFuncs as hf
-
-currentDir = os.path.dirname(__file__)
-settingDir = os.path.join(currentDir, "..", "..", "resources", "toleranceSetting.txt")
+from mojo.roboFont import CurrentFont
+from mojo.events import addObserver
+from vanilla import FloatingWindow, Slider, Button, TextBox, CheckBox
+from comCheckParallelUtils.toleranceSettings import toleranceSettings
 
 class ToleranceWindow:
-    def __init__(self):
+    def __init__(self, snapCallback=None):
         """
         Use "accuracy" in UI because it's easier to understand,
         but convert to "tolerance" because it's easier to use
         in parallel slope math later.
+
+        snapCallback is called with True or False when
+        "Snap to parallel" is turned on or off.
         """
         self.maxValue = 5
-        self.w = ShowHideWindow((150, 60), "Set Accuracy")
+        self.snapCallback = snapCallback
+        font = CurrentFont()
+
+        self.w = ShowHideWindow((150, 100), "Set Accuracy")
         self.w.accuracySlider = Slider((10, 9, -10, 23),
                                        minValue=0,
                                        maxValue=self.maxValue,
-                                       value=self.maxValue - hf.readSetting(settingDir),
+                                       value=self.maxValue - toleranceSettings.getTolerance(font),
                                        sizeStyle="small",
                                        callback=self.accuracySliderCB)
         self.w.lessText = TextBox((10, 30, -10, 12),
@@ -38,19 +45,80 @@ class ToleranceWindow:
                                   text="More",
                                   alignment="right",
                                   sizeStyle="small")
+        self.w.fontOnlyCheckBox = CheckBox((10, 50, -10, 20),
+                                           "Current font only",
+                                           value=toleranceSettings.hasFontTolerance(font),
+                                           sizeStyle="small",
+                                           callback=self.fontOnlyCheckBoxCB)
+        self.w.snapCheckBox = CheckBox((10, 70, -10, 20),
+                                       "Snap to parallel",
+                                       value=False,
+                                       sizeStyle="small",
+                                       callback=self.snapCheckBoxCB)
+
+        self.w.bind("became key", self.windowBecameKeyCB)
+        addObserver(self, "fontBecameCurrentCB", "fontBecameCurrent")
 
         self.w.center()
         self.w.makeKey()
 
+    def refreshControls(self, font=None):
+        """
+        Show font's tolerance (or the global one) and
+        whether it has its own, so the next change goes
+        where the window says it will
+        """
+        self.w.accuracySlider.set(self.maxValue - toleranceSettings.getTolerance(font))
+        self.w.fontOnlyCheckBox.set(toleranceSettings.hasFontTolerance(font))
+
+    def fontBecameCurrentCB(self, info):
+        self.refreshControls(info["font"])
+
+    def windowBecameKeyCB(self, sender):
+        self.refreshControls(CurrentFont())
+
     def accuracySliderCB(self, sender):
         """
-        When slider changes, write setting and post event.
+        When slider changes, update setting.
         Reverse slider value by subtracting from maxValue
         because we're tracking tolerance
         """
         toleranceValue = round(self.maxValue - sender.get(), 2)
-        hf.writeSetting(settingDir, toleranceValue)
-        postEvent("com.ToleranceSettingChanged")
+        toleranceSettings.setTolerance(toleranceValue, self._getFont())
+
+    def fontOnlyCheckBoxCB(self, sender):
+        """
+        When checked, store the current value in the font.
+        When unchecked, remove it from the font and
+        go back to the global setting.
+        """
+        font = CurrentFont()
+        if font is None:
+            sender.set(False)
+            return
+
+        if sender.get():
+            toleranceValue = round(self.maxValue - self.w.accuracySlider.get(), 2)
+            toleranceSettings.setTolerance(toleranceValue, font)
+        else:
+            toleranceSettings.clearFontTolerance(font)
+            self.w.accuracySlider.set(self.maxValue - toleranceSettings.getTolerance())
+
+    def snapCheckBoxCB(self, sender):
+        """
+        Pass on to whoever wants to know (the tool)
+        """
+        if self.snapCallback is not None:
+            self.snapCallback(bool(sender.get()))
+
+    def _getFont(self):
+        """
+        Return the font to store tolerance in,
+        or None to use the global setting
+        """
+        if self.w.fontOnlyCheckBox.get():
+            return CurrentFont()
+        return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+"""
+Open the Check Parallel Profiler window.
+Add this script to the extension's menu (or run it
+from the Scripting Window) to record timings of the
+guides and the tool, and export them.
+"""
+from comCheckParallelUtils.profilerWindow import ProfilerWindow
+
+profilerWindow = ProfilerWindow()
+profilerWindow.w.open()